@@ -1,6 +1,16 @@
 from datetime import datetime
+import csv
+import json
+import re
 import sqlite3
+import threading
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from migrations import migrate, customer_key, MNE_MIGRATIONS
+from sql_profiler import QueryProfiler, ProfiledCursor
+from records import ProductRecord, SupplierRecord, CustomerRecord
+from catalog_cache import CatalogCache, ReferenceCache
+from formatting import peso, number
 
 class CRUD(ABC):
     @abstractmethod
@@ -19,14 +29,285 @@ class CRUD(ABC):
     def view_method(self, db, choice, name=None, product_id=None):
         pass
 
+    @staticmethod
+    def _delete_many(db, table, key, ids, blockers) -> tuple[bool, dict | str]:
+        """
+        Delete the rows of table whose key is in ids, skipping rows still
+        referenced by another table.
+
+        One query checks every ID for existence and for each blocker
+        (table, column, label) at once; one DELETE then removes the rest, all
+        in a single transaction.
+
+        Returns:
+            (True, {id: "deleted" | reason}) or (False, error message)
+        """
+        outcomes = {}
+        candidates = []
+        for value in ids:
+            if str(value).strip().isdigit():
+                candidates.append(int(value))
+            else:
+                outcomes[value] = "ID must be a number."
+        if not candidates:
+            return True, outcomes
+
+        references = "".join(
+            f", (SELECT COUNT(*) FROM {ref_table} AS r WHERE r.{ref_column} = ids.value)"
+            for ref_table, ref_column, _ in blockers
+        )
+        try:
+            with db.transaction():
+                db.cursor.execute(f"""
+                    SELECT ids.value, t.{key} IS NOT NULL{references}
+                    FROM json_each(?) AS ids
+                    LEFT JOIN {table} AS t ON t.{key} = ids.value
+                """, (json.dumps(candidates),))
+
+                deletable = []
+                for item_id, found, *counts in db.cursor.fetchall():
+                    reasons = [f"{count} {label}" for count, (_, _, label) in zip(counts, blockers) if count]
+                    if not found:
+                        outcomes[item_id] = "Not found."
+                    elif reasons:
+                        outcomes[item_id] = f"Still referenced by {', '.join(reasons)}."
+                    else:
+                        outcomes[item_id] = "deleted"
+                        deletable.append(item_id)
+
+                if deletable:
+                    db.cursor.execute(f"DELETE FROM {table} WHERE {key} IN (SELECT value FROM json_each(?))",
+                                      (json.dumps(deletable),))
+            return True, outcomes
+
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
 class Database:
-    def __init__(self, database_name = "Hardware and Construction.db"):
-        self.conn = sqlite3.connect(database_name)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute('PRAGMA foreign_keys = ON')
+    """
+    Connection pool for the store database.
+
+    Every thread borrows its own connection (and cursor) from the pool the
+    first time it touches `conn` or `cursor`, and keeps reusing it after that.
+    Connections run in WAL mode so readers never block the single writer, and
+    are tuned with the PRAGMA profile given to the constructor. Pending schema
+    migrations (see migrations.py) are applied when the pool is created.
+    Product catalog reads are served from a CatalogCache of
+    catalog_cache_size result sets (0 disables it).
+    """
+    SYNCHRONOUS_MODES = ("OFF", "NORMAL", "FULL", "EXTRA")
+
+    _pools = {}
+    _pools_lock = threading.Lock()
+
+    def __init__(self, database_name = "Hardware and Construction.db", cache_size=-16000,
+                 mmap_size=268435456, synchronous="NORMAL", busy_timeout=5000, run_migrations=True,
+                 profile=False, slow_query_ms=None, catalog_cache_size=64):
+        if str(synchronous).upper() not in self.SYNCHRONOUS_MODES:
+            raise ValueError(f"synchronous must be one of {', '.join(self.SYNCHRONOUS_MODES)}.")
+
+        self.database_name = database_name
+        self.cache_size = int(cache_size)        # pages, or KiB when negative
+        self.mmap_size = int(mmap_size)          # bytes, 0 disables memory mapping
+        self.synchronous = str(synchronous).upper()
+        self.busy_timeout = int(busy_timeout)    # milliseconds
+
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+        self.profiler = QueryProfiler(slow_ms=slow_query_ms)
+        if profile:
+            self.profiler.enable()
+
+        # Open the creating thread's connection right away so errors surface here
+        self.conn
+
+        if run_migrations:
+            migrate(self.conn, MNE_MIGRATIONS)
+
+        # Search bars use the FTS5 indexes when the migration could create them
+        self.full_text_search = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'product_search'"
+        ).fetchone() is not None
+
+        in_memory = database_name == ":memory:" or str(database_name).startswith("file::memory:")
+        self.catalog_cache = (CatalogCache(database_name, catalog_cache_size)
+                              if catalog_cache_size > 0 and not in_memory else None)
+        self.references = ReferenceCache()
+
+    @classmethod
+    def shared(cls, database_name = "Hardware and Construction.db", **pragmas):
+        """Return the process-wide pool for database_name, creating it on first use."""
+        with cls._pools_lock:
+            pool = cls._pools.get(database_name)
+            if pool is None:
+                pool = cls(database_name, **pragmas)
+                cls._pools[database_name] = pool
+            return pool
+
+    def _connect(self):
+        conn = sqlite3.connect(
+            self.database_name,
+            timeout=self.busy_timeout / 1000,
+            check_same_thread=False,  # the pool guarantees one thread per connection
+            isolation_level=None      # transactions are opened explicitly by transaction()
+        )
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute(f"PRAGMA synchronous = {self.synchronous}")
+        conn.execute(f"PRAGMA cache_size = {self.cache_size}")
+        conn.execute(f"PRAGMA mmap_size = {self.mmap_size}")
+        conn.execute(f"PRAGMA busy_timeout = {self.busy_timeout}")
+        conn.execute("PRAGMA foreign_keys = ON")
+        return conn
+
+    @property
+    def conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            self._local.cursor = conn.cursor()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    @property
+    def cursor(self):
+        if getattr(self._local, "cursor", None) is None:
+            self.conn
+        if self.profiler.enabled:
+            profiled = getattr(self._local, "profiled", None)
+            if profiled is None or profiled._cursor is not self._local.cursor:
+                profiled = ProfiledCursor(self._local.cursor, self.profiler)
+                self._local.profiled = profiled
+            return profiled
+        return self._local.cursor
+
+    def record_cursor(self, row_factory):
+        """
+        Return the calling thread's cursor that builds rows with row_factory
+        (one of the record factories in records.py). Cursors are reused per
+        factory, so the record class for a statement is only built once.
+        """
+        cursors = getattr(self._local, "record_cursors", None)
+        if cursors is None or getattr(self._local, "record_conn", None) is not self.conn:
+            cursors = {}
+            self._local.record_cursors = cursors
+            self._local.record_conn = self.conn
+
+        cursor = cursors.get(row_factory)
+        if cursor is None:
+            cursor = self.conn.cursor()
+            cursor.row_factory = row_factory
+            cursors[row_factory] = cursor
+
+        if self.profiler.enabled:
+            return ProfiledCursor(cursor, self.profiler)
+        return cursor
+
+    def enable_profiling(self, slow_query_ms=None):
+        """Start timing every db.cursor statement; slower ones than slow_query_ms are logged."""
+        self.profiler.enable(slow_query_ms)
+
+    def disable_profiling(self):
+        self.profiler.disable()
+
+    def query_stats(self) -> list[dict]:
+        """p50/p95/max timings, row counts and calling methods per normalized SQL text."""
+        return self.profiler.stats()
+
+    def cached(self, key, loader, store_if=None):
+        """
+        Serve a catalog read from the CatalogCache. Reads made inside an open
+        transaction may see uncommitted rows, so they always go to the database.
+        """
+        if self.catalog_cache is None or self.in_transaction:
+            return loader()
+        return self.catalog_cache.get_or_load(key, loader, store_if)
+
+    def cache_stats(self) -> dict:
+        return self.catalog_cache.stats() if self.catalog_cache is not None else {}
+
+    @property
+    def in_transaction(self):
+        return getattr(self._local, "depth", 0) > 0
+
+    @contextmanager
+    def transaction(self):
+        """
+        Unit of work on the calling thread's connection.
+
+        The outermost block opens a write transaction and commits once when it
+        exits. Nested blocks become savepoints, so CRUD methods join whatever
+        transaction their caller already started instead of committing on
+        their own. An exception rolls the block back and is re-raised.
+        """
+        conn = self.conn
+        depth = getattr(self._local, "depth", 0)
+        savepoint = f"sp_{depth}"
+
+        if depth == 0:
+            conn.execute("BEGIN IMMEDIATE")
+        else:
+            conn.execute(f"SAVEPOINT {savepoint}")
+        self._local.depth = depth + 1
+
+        try:
+            yield self
+        except BaseException:
+            self._local.depth = depth
+            if depth == 0:
+                conn.execute("ROLLBACK")
+            else:
+                conn.execute(f"ROLLBACK TO {savepoint}")
+                conn.execute(f"RELEASE {savepoint}")
+            raise
+
+        self._local.depth = depth
+        if depth == 0:
+            try:
+                conn.execute("COMMIT")
+            except sqlite3.Error:
+                conn.execute("ROLLBACK")
+                raise
+        else:
+            conn.execute(f"RELEASE {savepoint}")
+
+    def release(self):
+        """Close the calling thread's connection, e.g. when a worker thread exits."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            return
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+        self._local.conn = None
+        self._local.cursor = None
+        self._local.record_cursors = None
+        self._local.depth = 0
+        conn.close()
+
+    def close(self):
+        """Close every pooled connection."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+        self._local = threading.local()
+        if self.catalog_cache is not None:
+            self.catalog_cache.close()
+
+
+def fts_match_expression(text):
+    """Turn search-bar text into an FTS5 prefix query: 'cem port' -> '"cem"* "port"*'."""
+    return " ".join(f'"{term}"*' for term in re.findall(r"\w+", text or ""))
 
 
 class Product(CRUD):
+    # SRP = capital * SRP_MARKUP unless a bulk update sets another markup
+    SRP_MARKUP = 1.25
+
     def __init__(self, product_name, category_id, type_id, quantity, capital, supplier_id,
                  date_received=None, expiration_date=None, lifespan=None):
 
@@ -44,62 +325,207 @@ class Product(CRUD):
         self.type_id = type_id
         self.quantity = quantity
         self.capital = capital
-        self.srp = round(self.capital * 1.25, 2)
+        self.srp = round(self.capital * self.SRP_MARKUP, 2)
         self.total_capital = round(self.capital * self.quantity, 2)
         self.supplier_id = supplier_id
         self.date_received = date_received or datetime.now().date()
         self.expiration_date = expiration_date
         self.lifespan = lifespan
 
-    def fk_exists(self, db, table, col, value):
-        db.cursor.execute(f"SELECT {col} FROM {table} WHERE {col} = ?", (value,))
-        return db.cursor.fetchone() is not None
+    def fk_exists(self, db, table, col, value, references=None):
+        # col is implied by table; the reference tables are looked up in db.references,
+        # or in a snapshot the caller already took for several checks
+        if references is None:
+            return db.references.exists(db.conn, table, value)
+        try:
+            return int(value) in references[table]
+        except (TypeError, ValueError):
+            return False
     
     def add_method(self, db: Database):
         try:
-            db.cursor.execute("""
-                SELECT * FROM products
-                WHERE product_name = ? AND category_id = ? AND type_id = ? AND supplier_id = ?
-            """, (self.product_name, self.category_id, self.type_id, self.supplier_id))
+            with db.transaction():
+                db.cursor.execute("""
+                    SELECT * FROM products
+                    WHERE product_name = ? AND category_id = ? AND type_id = ? AND supplier_id = ?
+                """, (self.product_name, self.category_id, self.type_id, self.supplier_id))
 
-            if db.cursor.fetchone():
-                return f"Product '{self.product_name}' already exists. Use Edit instead."
+                if db.cursor.fetchone():
+                    return f"Product '{self.product_name}' already exists. Use Edit instead."
+
+                db.cursor.execute("""
+                    INSERT INTO products (
+                        product_name, category_id, type_id, quantity,
+                        capital, srp, supplier_id, date_received,
+                        expiration_date, lifespan, total_capital
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, (
+                    self.product_name, self.category_id, self.type_id, self.quantity,
+                    self.capital, self.srp, self.supplier_id, self.date_received,
+                    self.expiration_date, self.lifespan, self.total_capital
+                ))
+                StockLedger.record(db, "receipt", [(db.cursor.lastrowid, self.quantity)])
 
-            db.cursor.execute("""
-                INSERT INTO products (
-                    product_name, category_id, type_id, quantity,
-                    capital, srp, supplier_id, date_received,
-                    expiration_date, lifespan, total_capital
-                )
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                self.product_name, self.category_id, self.type_id, self.quantity,
-                self.capital, self.srp, self.supplier_id, self.date_received,
-                self.expiration_date, self.lifespan, self.total_capital
-            ))
-
-            db.conn.commit()
             return f"Product '{self.product_name}' added successfully."
 
         except sqlite3.IntegrityError as e:
             return f"Database error: {e}"
 
+    @classmethod
+    def bulk_add(cls, db: Database, rows) -> tuple[int, list[tuple[int, str]]] | tuple[bool, str]:
+        """
+        Add many products in a single transaction.
+
+        Each row is a dict keyed like the constructor arguments and is checked
+        with the same rules as Product(...). Foreign keys are checked against
+        the reference tables once, duplicates against the catalog with one
+        set-based query, and the survivors are inserted with executemany.
+
+        Returns:
+            (inserted_count, rejects) where rejects lists (row_number, reason),
+            row numbers counting from 1, or (False, error message) when the
+            database fails and nothing was imported.
+        """
+        rejects = []
+        candidates = []
+        seen = set()
+
+        def column(row, name, label, convert, required=True):
+            value = row.get(name)
+            if value in (None, ""):
+                if required:
+                    raise ValueError(f"{label} is required.")
+                return None
+            try:
+                return convert(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{label} must be a number.") from None
+
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                product = cls(
+                    str(row.get("product_name") or ""),
+                    column(row, "category_id", "Category ID", int),
+                    column(row, "type_id", "Type ID", int),
+                    column(row, "quantity", "Quantity", int),
+                    column(row, "capital", "Capital", float),
+                    column(row, "supplier_id", "Supplier ID", int),
+                    date_received=row.get("date_received") or None,
+                    expiration_date=row.get("expiration_date") or None,
+                    lifespan=column(row, "lifespan", "Lifespan", int, required=False)
+                )
+            except (TypeError, ValueError) as e:
+                rejects.append((row_number, str(e)))
+                continue
+
+            key = (product.product_name, product.category_id, product.type_id, product.supplier_id)
+            if key in seen:
+                rejects.append((row_number, f"Product '{product.product_name}' appears more than once in the import."))
+                continue
+            seen.add(key)
+            candidates.append((row_number, product))
+
+        if not candidates:
+            return 0, rejects
+
+        try:
+            with db.transaction():
+                # -------- FOREIGN KEYS: checked against the reference cache --------
+                references = db.references.snapshot(db.conn)
+                categories = references["category"]
+                types = references["product_type"]
+                suppliers = references["supplier"]
+
+                valid = []
+                for row_number, product in candidates:
+                    if product.category_id not in categories:
+                        rejects.append((row_number, "Category ID does not exist."))
+                    elif product.type_id not in types:
+                        rejects.append((row_number, "Type ID does not exist."))
+                    elif product.supplier_id not in suppliers:
+                        rejects.append((row_number, "Supplier ID does not exist."))
+                    else:
+                        valid.append((row_number, product))
+
+                # -------- DUPLICATES: one join against the catalog --------
+                db.cursor.execute("""
+                    CREATE TEMP TABLE IF NOT EXISTS import_keys (
+                        row_number INTEGER PRIMARY KEY,
+                        product_name TEXT, category_id INTEGER, type_id INTEGER, supplier_id INTEGER
+                    )
+                """)
+                db.cursor.execute("DELETE FROM import_keys")
+                db.cursor.executemany("INSERT INTO import_keys VALUES (?, ?, ?, ?, ?)", [
+                    (row_number, p.product_name, p.category_id, p.type_id, p.supplier_id)
+                    for row_number, p in valid
+                ])
+                db.cursor.execute("""
+                    SELECT k.row_number
+                    FROM import_keys AS k
+                    JOIN products AS p
+                      ON p.product_name = k.product_name AND p.category_id = k.category_id
+                     AND p.type_id = k.type_id AND p.supplier_id = k.supplier_id
+                """)
+                existing = {r[0] for r in db.cursor.fetchall()}
+                db.cursor.execute("DELETE FROM import_keys")
+
+                to_insert = []
+                for row_number, product in valid:
+                    if row_number in existing:
+                        rejects.append((row_number, f"Product '{product.product_name}' already exists. Use Edit instead."))
+                    else:
+                        to_insert.append(product)
+
+                # AUTOINCREMENT ids only grow, so everything above this one is new
+                db.cursor.execute("SELECT COALESCE(MAX(product_id), 0) FROM products")
+                last_id = db.cursor.fetchone()[0]
+
+                db.cursor.executemany("""
+                    INSERT INTO products (
+                        product_name, category_id, type_id, quantity,
+                        capital, srp, supplier_id, date_received,
+                        expiration_date, lifespan, total_capital
+                    )
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """, [(
+                    p.product_name, p.category_id, p.type_id, p.quantity,
+                    p.capital, p.srp, p.supplier_id, p.date_received,
+                    p.expiration_date, p.lifespan, p.total_capital
+                ) for p in to_insert])
+
+                StockLedger.record_from(db, "receipt", """
+                    SELECT product_id, quantity AS quantity_change, NULL AS order_id
+                    FROM products WHERE product_id > ?
+                """, (last_id,), note="import")
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+        rejects.sort()
+        return len(to_insert), rejects
+
     def delete_method(self, product_id, db):
         try:
             if not str(product_id).isdigit():
                 raise ValueError("Product ID must be a number.")
 
-            db.cursor.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
-            if not db.cursor.fetchone():
-                return f"No product found with ID {product_id}."
+            with db.transaction():
+                db.cursor.execute("SELECT * FROM products WHERE product_id = ?", (product_id,))
+                if not db.cursor.fetchone():
+                    return f"No product found with ID {product_id}."
 
-            db.cursor.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
-            db.conn.commit()
+                db.cursor.execute("DELETE FROM products WHERE product_id = ?", (product_id,))
             return f"Product with ID {product_id} deleted successfully."
 
         except Exception as e:
             return f"Error deleting product: {str(e)}"
 
+    @staticmethod
+    def delete_many(ids, db) -> tuple[bool, dict | str]:
+        """Delete several products at once; products on past orders are left in place."""
+        return CRUD._delete_many(db, "products", "product_id", ids,
+                                 [("order_items", "product_id", "order item(s)")])
+
     def update_method(self, db: Database, product_id, updates: dict):
         try:
             if not updates:
@@ -129,46 +555,51 @@ class Product(CRUD):
                     updates[col] = int(updates[col])
 
             # -------- CENTRALIZED FOREIGN KEY VALIDATION --------
+            references = None
+            if updates.keys() & {"supplier_id", "category_id", "type_id"}:
+                references = db.references.snapshot(db.conn)
+
             if "supplier_id" in updates:
-                if not self.fk_exists(db, "supplier", "supplier_id", updates["supplier_id"]):
+                if not self.fk_exists(db, "supplier", "supplier_id", updates["supplier_id"], references):
                     return "Supplier ID does not exist."
 
             if "category_id" in updates:
-                if not self.fk_exists(db, "category", "category_id", updates["category_id"]):
+                if not self.fk_exists(db, "category", "category_id", updates["category_id"], references):
                     return "Category ID does not exist."
 
             if "type_id" in updates:
-                if not self.fk_exists(db, "product_type", "type_id", updates["type_id"]):
+                if not self.fk_exists(db, "product_type", "type_id", updates["type_id"], references):
                     return "Type ID does not exist."
             # -----------------------------------------------------
 
             # Auto-update SRP when capital changes
             if "capital" in updates:
-                updates["srp"] = round(updates["capital"] * 1.25, 2)
+                updates["srp"] = round(updates["capital"] * self.SRP_MARKUP, 2)
+            updates.pop("total_capital", None)
 
-            # Get product for total capital calculation
-            db.cursor.execute(
-                "SELECT quantity, capital FROM products WHERE product_id = ?",
-                (product_id,)
-            )
-            product = db.cursor.fetchone()
-
-            if not product:
-                return f"No product found with ID {product_id}."
-
-            old_qty, old_cap = product
-
-            qty = updates.get("quantity", old_qty)
-            cap = updates.get("capital", old_cap)
+            # Total capital is derived in SQL from the new (or current) quantity and capital
+            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+            quantity_expr = "?" if "quantity" in updates else "quantity"
+            capital_expr = "?" if "capital" in updates else "capital"
+            values = list(updates.values())
+            values += [updates[col] for col in ("quantity", "capital") if col in updates]
+            values.append(product_id)
 
-            updates["total_capital"] = round(qty * cap, 2)
+            with db.transaction():
+                if "quantity" in updates:
+                    StockLedger.record_from(db, "adjustment", """
+                        SELECT product_id, ? - quantity AS quantity_change, NULL AS order_id
+                        FROM products WHERE product_id = ?
+                    """, (updates["quantity"], product_id))
 
-            # Build update query dynamically
-            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
-            values = list(updates.values()) + [product_id]
+                db.cursor.execute(f"""
+                    UPDATE products
+                    SET {set_clause}, total_capital = ROUND({quantity_expr} * {capital_expr}, 2)
+                    WHERE product_id = ?
+                """, values)
 
-            db.cursor.execute(f"UPDATE products SET {set_clause} WHERE product_id = ?", values)
-            db.conn.commit()
+                if db.cursor.rowcount == 0:
+                    return f"No product found with ID {product_id}."
 
             return f"Product with ID {product_id} updated successfully."
 
@@ -177,11 +608,108 @@ class Product(CRUD):
 
 
 
-    def view_method(self, db, choice="all", name=None, product_id=None):
+    @staticmethod
+    def bulk_update(db: Database, product_ids=None, category_id=None, supplier_id=None,
+                    capital=None, capital_percent=None, quantity_delta=None,
+                    markup=None) -> tuple[bool, int | str]:
+        """
+        Update many products with one UPDATE statement in one transaction.
+
+        Exactly one target is given: a list of product_ids, a category_id or a
+        supplier_id. SRP and total capital are recomputed in SQL from the new
+        capital and quantity; SRP uses `markup` when given, SRP_MARKUP otherwise.
+
+        Args:
+            capital (float, optional): New capital per piece for every product.
+            capital_percent (float, optional): Capital change in percent, e.g. 5
+                for a 5% supplier price increase.
+            quantity_delta (int, optional): Added to (or, if negative, taken
+                from) every quantity. Fails if any quantity would go below zero.
+            markup (float, optional): New SRP-to-capital ratio, e.g. 1.30.
+
+        Returns:
+            (True, number of products updated) or (False, error message)
+        """
         try:
-            # --- Base query ---
-            base_query = """
-            SELECT 
+            targets = [t for t in (product_ids, category_id, supplier_id) if t is not None]
+            if len(targets) != 1:
+                raise ValueError("Give exactly one of product IDs, category ID or supplier ID.")
+            if capital is not None and capital_percent is not None:
+                raise ValueError("Give either a new capital or a capital percentage, not both.")
+            if all(v is None for v in (capital, capital_percent, quantity_delta, markup)):
+                raise ValueError("No updates provided.")
+
+            if product_ids is not None:
+                ids = [int(pid) for pid in product_ids]
+                if not ids:
+                    raise ValueError("No product IDs given.")
+                # One bound parameter regardless of selection size
+                where, target = "product_id IN (SELECT value FROM json_each(?))", json.dumps(ids)
+            elif category_id is not None:
+                where, target = "category_id = ?", int(category_id)
+            else:
+                where, target = "supplier_id = ?", int(supplier_id)
+
+            capital_expr, capital_params = "capital", []
+            if capital is not None:
+                if float(capital) < 0:
+                    raise ValueError("Capital must be non-negative.")
+                capital_expr, capital_params = "ROUND(?, 2)", [float(capital)]
+            elif capital_percent is not None:
+                if float(capital_percent) <= -100:
+                    raise ValueError("Capital cannot drop by 100% or more.")
+                capital_expr, capital_params = "ROUND(capital * (1 + ? / 100.0), 2)", [float(capital_percent)]
+
+            quantity_expr, quantity_params = "quantity", []
+            if quantity_delta is not None:
+                quantity_expr, quantity_params = "quantity + ?", [int(quantity_delta)]
+
+            markup_param = float(markup) if markup is not None else Product.SRP_MARKUP
+            if markup_param <= 0:
+                raise ValueError("Markup must be greater than zero.")
+
+            set_parts, params = [], []
+            if capital_params:
+                set_parts.append(f"capital = {capital_expr}")
+                params += capital_params
+            if quantity_params:
+                set_parts.append(f"quantity = {quantity_expr}")
+                params += quantity_params
+            if capital_params or markup is not None:
+                set_parts.append(f"srp = ROUND({capital_expr} * ?, 2)")
+                params += capital_params + [markup_param]
+            set_parts.append(f"total_capital = ROUND(({quantity_expr}) * {capital_expr}, 2)")
+            params += quantity_params + capital_params
+            params.append(target)
+
+            with db.transaction():
+                if quantity_params and int(quantity_delta) < 0:
+                    db.cursor.execute(
+                        f"SELECT COUNT(*) FROM products WHERE {where} AND quantity + ? < 0",
+                        (target, int(quantity_delta))
+                    )
+                    short = db.cursor.fetchone()[0]
+                    if short:
+                        raise ValueError(f"{short} product(s) do not have enough stock for that adjustment.")
+
+                if quantity_params:
+                    StockLedger.record_from(db, "adjustment", f"""
+                        SELECT product_id, ? AS quantity_change, NULL AS order_id
+                        FROM products WHERE {where}
+                    """, (int(quantity_delta), target))
+
+                db.cursor.execute(f"UPDATE products SET {', '.join(set_parts)} WHERE {where}", params)
+                updated = db.cursor.rowcount
+
+            return True, updated
+
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    # Columns shown by the product views, joined with their reference names
+    VIEW_COLUMNS = """
                 p.product_id,
                 p.product_name,
                 c.category_name,
@@ -193,12 +721,102 @@ class Product(CRUD):
                 s.supplier_name,
                 p.date_received,
                 p.expiration_date,
-                p.lifespan
+                p.lifespan"""
+    VIEW_FROM = """
             FROM products p
             JOIN category c ON p.category_id = c.category_id
             JOIN product_type t ON p.type_id = t.type_id
             JOIN supplier s ON p.supplier_id = s.supplier_id
             """
+    VIEW_QUERY = f"SELECT {VIEW_COLUMNS}{VIEW_FROM}"
+
+    # view_method reads products alone: the reference IDs come back under the
+    # name columns and are swapped for names from db.references by _label_rows
+    LOOKUP_QUERY = """
+            SELECT
+                p.product_id,
+                p.product_name,
+                p.category_id AS category_name,
+                p.type_id AS type_name,
+                p.quantity,
+                p.capital,
+                p.srp,
+                p.total_capital,
+                p.supplier_id AS supplier_name,
+                p.date_received,
+                p.expiration_date,
+                p.lifespan
+            FROM products p
+            """
+
+    # Full-text matches for view_page's keyword and _view's name, ranked by the index's weighted bm25
+    SEARCH_JOIN = """
+            JOIN (SELECT rowid AS match_id, rank FROM product_search WHERE product_search MATCH ?) AS f
+              ON f.match_id = p.product_id
+            """
+
+    # A search-bar keyword that is a year, optionally followed by dashes and digits
+    # ("2025", "2025-11", "2025-11-1"), is read as (part of) a date received
+    DATE_KEYWORD = re.compile(r"^\d{4}(-[\d-]*)?$")
+
+    # Sort keys accepted by view_page; NULL-able columns are coalesced so keyset comparisons stay total
+    SORT_COLUMNS = {
+        "product_id": "p.product_id",
+        "product_name": "p.product_name",
+        "category_name": "c.category_name",
+        "type_name": "t.type_name",
+        "quantity": "p.quantity",
+        "capital": "p.capital",
+        "srp": "p.srp",
+        "total_capital": "p.total_capital",
+        "supplier_name": "s.supplier_name",
+        "date_received": "p.date_received",
+        "expiration_date": "COALESCE(p.expiration_date, '')",
+        "relevance": "f.rank"
+    }
+
+    @staticmethod
+    def _format_rows(rows):
+        # Display strings for callers that ask for formatted=True; works on copies
+        # so cached rows keep their numbers
+        formatted = []
+        for r in rows:
+            r = type(r)(*r.values())
+            r.quantity = number(r.quantity)
+            r.capital = peso(r.capital)
+            r.srp = peso(r.srp)
+            r.total_capital = peso(r.total_capital)
+            formatted.append(r)
+        return formatted
+
+    @staticmethod
+    def _label_rows(db, rows):
+        references = db.references.snapshot(db.conn)
+        categories = references["category"]
+        types = references["product_type"]
+        suppliers = references["supplier"]
+        for r in rows:
+            r.category_name = categories.get(r.category_name, "")
+            r.type_name = types.get(r.type_name, "")
+            r.supplier_name = suppliers.get(r.supplier_name, "")
+        return rows
+
+    def view_method(self, db, choice="all", name=None, product_id=None, formatted=False):
+        """
+        Products with their category, type and supplier names. Quantities and
+        peso amounts are numbers unless formatted=True.
+        """
+        rows = db.cached(("Product.view_method", choice, name, product_id),
+                         lambda: self._view(db, choice, name, product_id),
+                         store_if=lambda result: not isinstance(result, str))
+        if formatted and not isinstance(rows, str):
+            return self._format_rows(rows)
+        return rows
+
+    def _view(self, db, choice, name, product_id):
+        try:
+            # --- Base query ---
+            base_query = self.LOOKUP_QUERY
 
             params = ()
 
@@ -208,39 +826,550 @@ class Product(CRUD):
                     base_query += " WHERE p.product_id = ?"
                     params = (product_id,)
                 elif name:
-                    base_query += " WHERE p.product_name LIKE ?"
-                    params = (f"%{name}%",)
+                    match = fts_match_expression(name)
+                    if db.full_text_search and match:
+                        # Product-name column of the full-text index, best match first
+                        base_query += self.SEARCH_JOIN + " ORDER BY f.rank"
+                        params = (f"product_name : ({match})",)
+                    else:
+                        base_query += " WHERE p.product_name LIKE ?"
+                        params = (f"%{name}%",)
                 else:
                     return "Please provide product ID or name."
 
-            db.cursor.execute(base_query, params)
-            rows = db.cursor.fetchall()
+            cursor = db.record_cursor(ProductRecord)
+            cursor.execute(base_query, params)
+            rows = self._label_rows(db, cursor.fetchall())
 
-            columns = [
-                "product_id", "product_name", "category_name",
-                "type_name", "quantity", "capital",
-                "srp", "total_capital", "supplier_name",
-                "date_received", "expiration_date", "lifespan"
-            ]
+            return rows if rows else "No product found."
 
-            formatted_rows = []
-            for r in rows:
-                r = list(r)
+        except Exception as e:
+            return f"Database error: {str(e)}"
 
-                # Format quantity (2 decimals + commas)
-                r[4] = f"{r[4]:,.2f}"
+    @staticmethod
+    def _reference_filter(value, id_column, name_column):
+        # Digits filter by ID, anything else by (partial) name
+        if isinstance(value, int) or str(value).strip().isdigit():
+            return f"{id_column} = ?", int(value)
+        return f"{name_column} LIKE ?", f"%{str(value).strip()}%"
+
+    def view_page(self, db, page_size=100, after=None, sort="product_id", descending=False,
+                  keyword=None, name=None, category=None, product_type=None, supplier=None,
+                  date_from=None, date_to=None, with_total=None, formatted=False):
+        """
+        Fetch one page of the product catalog with filtering done in SQL.
+
+        Pages are keyset-paginated: pass the "next" value of one page as
+        `after` to get the following one. Category, type and supplier filters
+        take either an ID or part of the name; `keyword` matches any of the
+        product, category, type or supplier names and the date received, the
+        way the Inventory search bar does, using the product_search full-text
+        index (prefix terms, sort="relevance" for best match first) when it
+        exists. The total is only counted for the first page unless
+        with_total is given. Pages are served from the catalog cache while
+        the database is unchanged. Numbers are returned as numbers unless
+        formatted=True.
+
+        Returns:
+            (True, {"rows": [...], "next": cursor or None, "total": int or None})
+            or (False, error message)
+        """
+        args = (page_size, after, sort, descending, keyword, name, category, product_type,
+                supplier, date_from, date_to, with_total)
+        result = db.cached(("Product.view_page",) + args, lambda: self._page(db, *args),
+                           store_if=lambda result: result[0])
+        if formatted and result[0]:
+            return True, dict(result[1], rows=self._format_rows(result[1]["rows"]))
+        return result
+
+    def _page(self, db, page_size, after, sort, descending, keyword, name, category, product_type,
+              supplier, date_from, date_to, with_total):
+        try:
+            if sort not in self.SORT_COLUMNS:
+                return False, f"Invalid sort column: {sort}"
+            page_size = int(page_size)
+            if page_size <= 0:
+                return False, "Page size must be greater than zero."
+            if with_total is None:
+                with_total = after is None
+
+            conditions, params = [], []
+            search_join, search_params = "", []
+
+            keyword = (keyword or "").strip()
+            match = fts_match_expression(keyword)
+            if keyword and db.full_text_search and match and not self.DATE_KEYWORD.match(keyword):
+                search_join, search_params = self.SEARCH_JOIN, [match]
+            elif keyword and self.DATE_KEYWORD.match(keyword):
+                conditions.append("p.date_received LIKE ?")
+                params.append(f"{keyword}%")
+            elif keyword:
+                like = f"%{keyword}%"
+                conditions.append("""(p.product_name LIKE ? OR c.category_name LIKE ? OR t.type_name LIKE ?
+                     OR s.supplier_name LIKE ? OR p.date_received LIKE ?)""")
+                params += [like] * 5
+
+            if sort == "relevance" and not search_join:
+                sort = "product_id"
+            sort_expr = self.SORT_COLUMNS[sort]
+            if name:
+                conditions.append("p.product_name LIKE ?")
+                params.append(f"%{name.strip()}%")
+            if category not in (None, ""):
+                condition, value = self._reference_filter(category, "p.category_id", "c.category_name")
+                conditions.append(condition)
+                params.append(value)
+            if product_type not in (None, ""):
+                condition, value = self._reference_filter(product_type, "p.type_id", "t.type_name")
+                conditions.append(condition)
+                params.append(value)
+            if supplier not in (None, ""):
+                condition, value = self._reference_filter(supplier, "p.supplier_id", "s.supplier_name")
+                conditions.append(condition)
+                params.append(value)
+            if date_from:
+                conditions.append("p.date_received >= ?")
+                params.append(str(date_from))
+            if date_to:
+                conditions.append("p.date_received <= ?")
+                params.append(str(date_to))
+
+            total = None
+            if with_total:
+                where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+                db.cursor.execute(f"SELECT COUNT(*) {self.VIEW_FROM} {search_join} {where}",
+                                  search_params + params)
+                total = db.cursor.fetchone()[0]
+
+            page_conditions, page_params = list(conditions), search_params + params
+            if after is not None:
+                last_value, last_id = after
+                page_conditions.append(f"({sort_expr}, p.product_id) {'<' if descending else '>'} (?, ?)")
+                page_params += [last_value, last_id]
+
+            direction = "DESC" if descending else "ASC"
+            columns = self.VIEW_COLUMNS + (", f.rank" if search_join else "")
+            query = f"SELECT {columns}{self.VIEW_FROM}{search_join}"
+            if page_conditions:
+                query += f" WHERE {' AND '.join(page_conditions)}"
+            query += f" ORDER BY {sort_expr} {direction}, p.product_id {direction} LIMIT ?"
+            page_params.append(page_size + 1)   # one extra row tells us whether a next page exists
+
+            cursor = db.record_cursor(ProductRecord)
+            cursor.execute(query, page_params)
+            rows = cursor.fetchall()
+
+            next_cursor = None
+            if len(rows) > page_size:
+                rows = rows[:page_size]
+                last = rows[-1]
+                if sort == "relevance":
+                    last_value = last.rank
+                elif sort == "expiration_date":
+                    last_value = last.expiration_date or ""
+                else:
+                    last_value = last[sort]
+                next_cursor = (last_value, last.product_id)
 
-                # Format capital, srp, total_capital with peso sign + commas + 2 decimals
-                r[5] = f"₱{r[5]:,.2f}"  # capital
-                r[6] = f"₱{r[6]:,.2f}"  # srp
-                r[7] = f"₱{r[7]:,.2f}"  # total_capital
+            return True, {"rows": rows, "next": next_cursor, "total": total}
 
-                formatted_rows.append(dict(zip(columns, r)))
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
 
-            return formatted_rows if formatted_rows else "No product found."
 
-        except Exception as e:
-            return f"Database error: {str(e)}"
+class ProductImporter:
+    """Loads supplier price lists (CSV or JSON) into the catalog through Product.bulk_add."""
+
+    @staticmethod
+    def _normalize(row: dict) -> dict:
+        # "Product Name" and "product_name" headers both map to product_name
+        return {str(k).strip().lower().replace(" ", "_"): (v.strip() if isinstance(v, str) else v)
+                for k, v in row.items() if k is not None}
+
+    @staticmethod
+    def read_csv(path: str) -> list[dict]:
+        with open(path, newline="", encoding="utf-8-sig") as f:
+            return [ProductImporter._normalize(row) for row in csv.DictReader(f)]
+
+    @staticmethod
+    def read_json(path: str) -> list[dict]:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            data = data.get("products", [])
+        if not isinstance(data, list):
+            raise ValueError("JSON import must be a list of products or an object with a 'products' list.")
+        return [ProductImporter._normalize(row) for row in data]
+
+    @staticmethod
+    def import_file(db: Database, path: str) -> tuple[int, list[tuple[int, str]]] | tuple[bool, str]:
+        """
+        Import a .csv or .json file. Returns the same (inserted_count, rejects)
+        pair, or (False, error message), as Product.bulk_add; for CSV files
+        row 1 is the first line after the header.
+        """
+        if path.lower().endswith(".csv"):
+            rows = ProductImporter.read_csv(path)
+        elif path.lower().endswith(".json"):
+            rows = ProductImporter.read_json(path)
+        else:
+            raise ValueError("Only .csv and .json files can be imported.")
+        return Product.bulk_add(db, rows)
+
+
+class ExpiryScanner:
+    """
+    Expiration and lifespan alerts for products still in stock.
+
+    Both checks are range scans over partial indexes (migration 9):
+    idx_products_expiration on expiration_date, and idx_products_lifespan_end
+    on the generated lifespan_end column (date received + lifespan days).
+    SQLite keeps the indexes current on every insert and edit, so nothing
+    has to be rescanned when the Dashboard asks for counts.
+    """
+
+    ALERT_COLUMNS = """
+        SELECT product_id, product_name, quantity, date_received, expiration_date, lifespan, lifespan_end
+        FROM products
+    """
+
+    @staticmethod
+    def _today(today):
+        return str(today or datetime.now().date())
+
+    @staticmethod
+    def expiring(db: Database, within_days: int = 30, today=None) -> tuple[bool, list | str]:
+        """Products in stock that expire between today and today + within_days, soonest first."""
+        try:
+            today = ExpiryScanner._today(today)
+            cursor = db.record_cursor(ProductRecord)
+            cursor.execute(ExpiryScanner.ALERT_COLUMNS + """
+                WHERE expiration_date IS NOT NULL AND expiration_date <> ''
+                  AND expiration_date BETWEEN ? AND date(?, '+' || ? || ' days')
+                  AND quantity > 0
+                ORDER BY expiration_date, product_id
+            """, (today, today, int(within_days)))
+            return True, cursor.fetchall()
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    @staticmethod
+    def expired(db: Database, today=None) -> tuple[bool, list | str]:
+        """Products in stock whose expiration date has passed, oldest first."""
+        try:
+            cursor = db.record_cursor(ProductRecord)
+            cursor.execute(ExpiryScanner.ALERT_COLUMNS + """
+                WHERE expiration_date IS NOT NULL AND expiration_date <> ''
+                  AND expiration_date < ?
+                  AND quantity > 0
+                ORDER BY expiration_date, product_id
+            """, (ExpiryScanner._today(today),))
+            return True, cursor.fetchall()
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    @staticmethod
+    def past_lifespan(db: Database, today=None) -> tuple[bool, list | str]:
+        """Products in stock held longer than their lifespan, oldest first."""
+        try:
+            cursor = db.record_cursor(ProductRecord)
+            cursor.execute(ExpiryScanner.ALERT_COLUMNS + """
+                WHERE lifespan_end IS NOT NULL AND lifespan_end < ?
+                  AND quantity > 0
+                ORDER BY lifespan_end, product_id
+            """, (ExpiryScanner._today(today),))
+            return True, cursor.fetchall()
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    @staticmethod
+    def alert_counts(db: Database, within_days: int = 30, today=None) -> tuple[bool, dict | str]:
+        """
+        Returns:
+            (True, {"expiring": n, "expired": n, "past_lifespan": n}) or (False, error message)
+        """
+        try:
+            today = ExpiryScanner._today(today)
+            db.cursor.execute("""
+                SELECT
+                    (SELECT COUNT(*) FROM products
+                     WHERE expiration_date IS NOT NULL AND expiration_date <> ''
+                       AND expiration_date BETWEEN ? AND date(?, '+' || ? || ' days') AND quantity > 0),
+                    (SELECT COUNT(*) FROM products
+                     WHERE expiration_date IS NOT NULL AND expiration_date <> ''
+                       AND expiration_date < ? AND quantity > 0),
+                    (SELECT COUNT(*) FROM products
+                     WHERE lifespan_end IS NOT NULL AND lifespan_end < ? AND quantity > 0)
+            """, (today, today, int(within_days), today, today))
+            expiring, expired, past_lifespan = db.cursor.fetchone()
+            return True, {"expiring": expiring, "expired": expired, "past_lifespan": past_lifespan}
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+
+class StockLedger:
+    """
+    Append-only history of stock changes (stock_movements, migration 11).
+
+    Every backend method that changes products.quantity writes the matching
+    movement inside the same transaction: receipts when stock is added,
+    sales at checkout and adjustments for edits. stock_snapshots holds the
+    quantity on hand at the start of a day, taken periodically, so the
+    stock at any past date is the nearest earlier snapshot plus the
+    movements after it.
+    """
+
+    KINDS = ("receipt", "sale", "adjustment")
+
+    @staticmethod
+    def _now():
+        return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+    @staticmethod
+    def record(db: Database, kind: str, changes, order_id=None, note=None):
+        """
+        Append movements for changes, a list of (product_id, quantity_change).
+        Call inside the transaction that changes the quantities.
+        """
+        if kind not in StockLedger.KINDS:
+            raise ValueError(f"Invalid movement kind: {kind}")
+        moved_at = StockLedger._now()
+        db.cursor.executemany("""
+            INSERT INTO stock_movements (product_id, moved_at, kind, quantity_change, order_id, note)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, [(product_id, moved_at, kind, change, order_id, note)
+              for product_id, change in changes if change])
+
+    @staticmethod
+    def record_from(db: Database, kind: str, select_sql: str, params=(), note=None):
+        """
+        Append one movement per row of select_sql, a query returning the
+        columns product_id, quantity_change and order_id. Lets set-based
+        updates log their movements with one statement as well.
+        """
+        if kind not in StockLedger.KINDS:
+            raise ValueError(f"Invalid movement kind: {kind}")
+        db.cursor.execute(f"""
+            INSERT INTO stock_movements (product_id, moved_at, kind, quantity_change, order_id, note)
+            SELECT m.product_id, ?, ?, m.quantity_change, m.order_id, ?
+            FROM ({select_sql}) AS m
+            WHERE m.quantity_change <> 0
+        """, (StockLedger._now(), kind, note, *params))
+
+    @staticmethod
+    def take_snapshot(db: Database, snapshot_date=None) -> tuple[bool, int | str]:
+        """
+        Store every product's quantity at the start of snapshot_date (default
+        today), computed from the previous snapshot and the movements since.
+
+        Returns:
+            (True, number of products in the snapshot) or (False, error message)
+        """
+        try:
+            snapshot_date = str(snapshot_date or datetime.now().date())
+            with db.transaction():
+                db.cursor.execute("SELECT COUNT(*) FROM stock_snapshots WHERE snapshot_date = ?", (snapshot_date,))
+                existing = db.cursor.fetchone()[0]
+                if existing:
+                    return True, existing
+
+                db.cursor.execute("SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date < ?",
+                                  (snapshot_date,))
+                previous = db.cursor.fetchone()[0] or ""
+
+                db.cursor.execute("""
+                    INSERT INTO stock_snapshots (snapshot_date, product_id, quantity)
+                    SELECT ?, product_id, SUM(quantity)
+                    FROM (
+                        SELECT product_id, quantity FROM stock_snapshots WHERE snapshot_date = ?
+                        UNION ALL
+                        SELECT product_id, quantity_change FROM stock_movements
+                        WHERE moved_at >= ? AND moved_at < ?
+                    )
+                    GROUP BY product_id
+                    HAVING SUM(quantity) <> 0
+                """, (snapshot_date, previous, previous, snapshot_date))
+                count = db.cursor.rowcount
+            return True, count
+        except sqlite3.Error as e:
+            return False, f"Failed to take stock snapshot: {e}"
+
+    @staticmethod
+    def snapshot_if_due(db: Database, every_days: int = 30) -> tuple[bool, int | str | None]:
+        """Take today's snapshot when the latest one is every_days old or more; (True, None) if not due."""
+        try:
+            db.cursor.execute("""
+                SELECT MAX(snapshot_date) IS NULL OR MAX(snapshot_date) <= date('now', 'localtime', ?)
+                FROM stock_snapshots
+            """, (f"-{int(every_days)} days",))
+            if not db.cursor.fetchone()[0]:
+                return True, None
+            return StockLedger.take_snapshot(db)
+        except sqlite3.Error as e:
+            return False, f"Failed to check stock snapshots: {e}"
+
+    @staticmethod
+    def quantity_at(db: Database, at, product_id=None) -> tuple[bool, dict | int | str]:
+        """
+        Stock on hand at the end of the day `at` (a date or 'YYYY-MM-DD').
+
+        Reads the latest snapshot taken no later than the next morning and
+        adds only the movements recorded after it.
+
+        Returns:
+            (True, {product_id: quantity}) for every product with stock, or
+            (True, quantity) when product_id is given; (False, error message)
+        """
+        try:
+            db.cursor.execute("SELECT date(?, '+1 day')", (str(at)[:10],))
+            cutoff = db.cursor.fetchone()[0]
+            if cutoff is None:
+                raise ValueError("Date must be in YYYY-MM-DD format.")
+
+            db.cursor.execute("SELECT MAX(snapshot_date) FROM stock_snapshots WHERE snapshot_date <= ?", (cutoff,))
+            snapshot = db.cursor.fetchone()[0] or ""
+
+            product_filter = "" if product_id is None else " AND product_id = ?"
+            product_params = () if product_id is None else (int(product_id),)
+            db.cursor.execute(f"""
+                SELECT product_id, SUM(quantity)
+                FROM (
+                    SELECT product_id, quantity FROM stock_snapshots
+                    WHERE snapshot_date = ?{product_filter}
+                    UNION ALL
+                    SELECT product_id, quantity_change FROM stock_movements
+                    WHERE moved_at >= ? AND moved_at < ?{product_filter}
+                )
+                GROUP BY product_id
+            """, (snapshot, *product_params, snapshot, cutoff, *product_params))
+            quantities = {pid: quantity for pid, quantity in db.cursor.fetchall() if quantity}
+
+            if product_id is not None:
+                return True, quantities.get(int(product_id), 0)
+            return True, quantities
+
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    @staticmethod
+    def movements(db: Database, product_id=None, date_from=None, date_to=None) -> tuple[bool, list[tuple] | str]:
+        """
+        Returns:
+            (True, list of (movement_id, product_id, moved_at, kind, quantity_change, order_id, note))
+            oldest first, optionally for one product and an inclusive date range
+        """
+        try:
+            conditions, params = [], []
+            if product_id is not None:
+                conditions.append("product_id = ?")
+                params.append(int(product_id))
+            if date_from:
+                conditions.append("moved_at >= ?")
+                params.append(str(date_from))
+            if date_to:
+                conditions.append("moved_at < date(?, '+1 day')")
+                params.append(str(date_to)[:10])
+            where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+            db.cursor.execute(f"""
+                SELECT movement_id, product_id, moved_at, kind, quantity_change, order_id, note
+                FROM stock_movements
+                {where}
+                ORDER BY moved_at, movement_id
+            """, params)
+            return True, db.cursor.fetchall()
+        except (TypeError, ValueError) as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+
+class InventoryValuation:
+    """
+    Inventory value per category, product type and supplier.
+
+    Reads the inventory_valuation table that triggers on products keep up to
+    date (migration 10), so every call costs one row per group instead of a
+    scan and sum over the whole catalog.
+    """
+
+    # dimension -> reference table holding the group names
+    DIMENSIONS = {"category": "category", "type": "product_type", "supplier": "supplier"}
+
+    @staticmethod
+    def by(db: Database, dimension: str) -> tuple[bool, list[dict] | str]:
+        """
+        Returns:
+            (True, list of dicts with group_id, name, product_count, units,
+            total_capital and retail_value, highest capital first) or
+            (False, error message)
+        """
+        try:
+            if dimension not in InventoryValuation.DIMENSIONS:
+                raise ValueError(f"Invalid valuation dimension: {dimension}")
+
+            db.cursor.execute("""
+                SELECT group_id, product_count, units, total_capital, retail_value
+                FROM inventory_valuation
+                WHERE dimension = ? AND product_count > 0
+                ORDER BY total_capital DESC, group_id
+            """, (dimension,))
+            rows = db.cursor.fetchall()
+
+            names = db.references.names(db.conn, InventoryValuation.DIMENSIONS[dimension])
+            return True, [{
+                "group_id": group_id,
+                "name": names.get(group_id, ""),
+                "product_count": product_count,
+                "units": units,
+                "total_capital": total_capital,
+                "retail_value": retail_value
+            } for group_id, product_count, units, total_capital, retail_value in rows]
+
+        except ValueError as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
+
+    @staticmethod
+    def by_category(db: Database) -> tuple[bool, list[dict] | str]:
+        return InventoryValuation.by(db, "category")
+
+    @staticmethod
+    def by_type(db: Database) -> tuple[bool, list[dict] | str]:
+        return InventoryValuation.by(db, "type")
+
+    @staticmethod
+    def by_supplier(db: Database) -> tuple[bool, list[dict] | str]:
+        return InventoryValuation.by(db, "supplier")
+
+    @staticmethod
+    def totals(db: Database) -> tuple[bool, dict | str]:
+        """
+        Returns:
+            (True, {"product_count", "units", "total_capital", "retail_value"})
+            or (False, error message)
+        """
+        try:
+            db.cursor.execute("""
+                SELECT COALESCE(SUM(product_count), 0), COALESCE(SUM(units), 0),
+                       ROUND(COALESCE(SUM(total_capital), 0), 2), ROUND(COALESCE(SUM(retail_value), 0), 2)
+                FROM inventory_valuation
+                WHERE dimension = 'category'
+            """)
+            product_count, units, total_capital, retail_value = db.cursor.fetchone()
+            return True, {"product_count": product_count, "units": units,
+                          "total_capital": total_capital, "retail_value": retail_value}
+        except sqlite3.Error as e:
+            return False, f"Database error: {e}"
 
 
 class Supplier(CRUD):
@@ -267,14 +1396,14 @@ class Supplier(CRUD):
  
     def add_method(self, db):
         try:
-            db.cursor.execute("""
-                INSERT INTO supplier (
-                    supplier_name, contact_person, contact_number, email, address
-                ) VALUES (?, ?, ?, ?, ?)
-            """, (
-                self.supplier_name, self.contact_person, self.contact_number, self.email, self.address
-            ))
-            db.conn.commit()
+            with db.transaction():
+                db.cursor.execute("""
+                    INSERT INTO supplier (
+                        supplier_name, contact_person, contact_number, email, address
+                    ) VALUES (?, ?, ?, ?, ?)
+                """, (
+                    self.supplier_name, self.contact_person, self.contact_number, self.email, self.address
+                ))
             return f"{self.supplier_name}' added successfully."
         except sqlite3.IntegrityError as e:
             raise ValueError(f"Database error: {e}")
@@ -287,20 +1416,26 @@ class Supplier(CRUD):
             if not str(supplier_id).isdigit():
                 raise ValueError("Supplier ID must be a number")
 
-            db.cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
-            supplier = db.cursor.fetchone()
-            
-            if supplier:
-                db.cursor.execute("DELETE FROM supplier WHERE supplier_id = ?", (supplier_id,))
-                db.conn.commit()
-                return f"Supplier with ID {supplier_id} deleted successfully."
-            else:
-                return f"No supplier found with ID {supplier_id}."
+            with db.transaction():
+                db.cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
+                supplier = db.cursor.fetchone()
+
+                if supplier:
+                    db.cursor.execute("DELETE FROM supplier WHERE supplier_id = ?", (supplier_id,))
+                    return f"Supplier with ID {supplier_id} deleted successfully."
+                else:
+                    return f"No supplier found with ID {supplier_id}."
         except ValueError as e:
             return str(e)
         except Exception as e:
             return f"Error deleting supplier: {str(e)}"
         
+    @staticmethod
+    def delete_many(ids, db) -> tuple[bool, dict | str]:
+        """Delete several suppliers at once; suppliers with products are left in place."""
+        return CRUD._delete_many(db, "supplier", "supplier_id", ids,
+                                 [("products", "supplier_id", "product(s)")])
+
     def update_method(self, db: Database, supplier_id, updates: dict):
         try:
             if not updates:
@@ -332,20 +1467,18 @@ class Supplier(CRUD):
                     if "@" not in value or "." not in value.split("@")[-1]:
                         raise ValueError("Invalid email format. Must contain '@' and a domain (e.g., example@mail.com).")
 
-            
-            db.cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
-            existing = db.cursor.fetchone()
-            if not existing:
-                return f"No supplier found with ID {supplier_id}."
+            with db.transaction():
+                db.cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
+                existing = db.cursor.fetchone()
+                if not existing:
+                    return f"No supplier found with ID {supplier_id}."
 
-            
-            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
-            values = list(updates.values())
-            values.append(supplier_id)
+                set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+                values = list(updates.values())
+                values.append(supplier_id)
 
-            query = f"UPDATE supplier SET {set_clause} WHERE supplier_id = ?"
-            db.cursor.execute(query, values)
-            db.conn.commit()
+                query = f"UPDATE supplier SET {set_clause} WHERE supplier_id = ?"
+                db.cursor.execute(query, values)
 
             return f"Supplier with ID {supplier_id} updated successfully."
 
@@ -358,33 +1491,32 @@ class Supplier(CRUD):
         
     def view_method(self, db, choice="all", name = None, supplier_id = None):
         try:
-            db.cursor.execute("PRAGMA table_info(supplier)")
-            columns = [col[1] for col in db.cursor.fetchall()]
-
             if choice.lower() not in ["all", "one"]:
                 raise ValueError("Choice must be either 'all' or 'one'.")
 
+            cursor = db.record_cursor(SupplierRecord)
+
             if choice.lower() == "one":
                 if supplier_id is not None:
                     if not str(supplier_id).isdigit():
                         raise ValueError("Supplier ID must be numeric.")
-                    db.cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
+                    cursor.execute("SELECT * FROM supplier WHERE supplier_id = ?", (supplier_id,))
                 elif name:
-                    db.cursor.execute("SELECT * FROM supplier WHERE supplier_name LIKE ?", (f"%{name}%",))
+                    cursor.execute("SELECT * FROM supplier WHERE supplier_name LIKE ?", (f"%{name}%",))
                 else:
                     raise ValueError("Provide either 'name' or 'supplier_id' to view a supplier.")
 
-                result = db.cursor.fetchall()
+                result = cursor.fetchall()
                 if result:
-                    return [dict(zip(columns, row)) for row in result]
+                    return result
                 else:
                     return "No supplier found matching your criteria."
 
             else:
-                db.cursor.execute("SELECT * FROM supplier")
-                result = db.cursor.fetchall()
+                cursor.execute("SELECT * FROM supplier")
+                result = cursor.fetchall()
                 if result:
-                    return [dict(zip(columns, row)) for row in result]
+                    return result
                 else:
                     return "No suppliers found in database."
 
@@ -396,6 +1528,35 @@ class Supplier(CRUD):
             return f"Unexpected error: {str(e)}"
 
 
+    @staticmethod
+    def search(db, text):
+        """
+        Suppliers whose name, contact person or email match text, best match
+        first. Uses the supplier_search full-text index with prefix terms when
+        available, otherwise substring LIKE filters.
+        """
+        try:
+            cursor = db.record_cursor(SupplierRecord)
+            match = fts_match_expression(text)
+            if db.full_text_search and match:
+                cursor.execute("""
+                    SELECT s.*
+                    FROM supplier_search AS f
+                    JOIN supplier AS s ON s.supplier_id = f.rowid
+                    WHERE supplier_search MATCH ?
+                    ORDER BY f.rank
+                """, (match,))
+            else:
+                like = f"%{(text or '').strip()}%"
+                cursor.execute("""
+                    SELECT * FROM supplier
+                    WHERE supplier_name LIKE ? OR contact_person LIKE ? OR email LIKE ?
+                """, (like, like, like))
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            return f"Database error: {e}"
+
+
 class Users:
     def __init__(self, username, password, fullname, contact_number, age, gender, address):
         # Store attributes
@@ -420,23 +1581,23 @@ class Users:
         self.__password = password
         
     def enter_to_db(self, db):
-        try:       
-            db.cursor.execute(
-                """
-                INSERT INTO users (username, password, fullName, contNumber, gender, age, address)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    self.__username,
-                    self.__password,
-                    self.fullname,
-                    self.contact_number,
-                    self.gender,
-                    self.age,
-                    self.address
+        try:
+            with db.transaction():
+                db.cursor.execute(
+                    """
+                    INSERT INTO users (username, password, fullName, contNumber, gender, age, address)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        self.__username,
+                        self.__password,
+                        self.fullname,
+                        self.contact_number,
+                        self.gender,
+                        self.age,
+                        self.address
+                    )
                 )
-            )
-            db.conn.commit()   # <-- FIXED (was self.db.conn, which is wrong)
 
         except sqlite3.IntegrityError as e:
             raise ValueError(f"Database error: {e}")
@@ -466,7 +1627,7 @@ class Users:
         
     @staticmethod
     
-    def validate_signup(username, password, fullname, contact_number, gender, age, address):
+    def validate_signup(username, password, fullname, contact_number, gender, age, address, db=None):
         # Username validation
         if not username.strip():
             raise ValueError("Username cannot be empty.")
@@ -504,7 +1665,7 @@ class Users:
             raise ValueError("Address cannot be a number.")
 
         # Check if username already exists in DB
-        if Users.check_users(username, db = Database()):
+        if Users.check_users(username, db = db or Database.shared()):
             raise ValueError("Username already exists. Please choose a different username.")
 
         return True  # Valid
@@ -516,14 +1677,18 @@ class Customers(CRUD):
         self.customer_name = customer_name.strip()
         self.contact = contact.strip() if contact else None
         self.address = address.strip() if address else None
+        self.customer_key = customer_key(self.customer_name, self.contact)
 
     def add_method(self, db):
         try:
-            db.cursor.execute("""
-                INSERT INTO customers (customer_name, contact, address)
-                VALUES (?, ?, ?)
-            """, (self.customer_name, self.contact, self.address))
-            db.conn.commit()
+            with db.transaction():
+                db.cursor.execute("""
+                    INSERT INTO customers (customer_name, contact, address, customer_key)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (customer_key) DO NOTHING
+                """, (self.customer_name, self.contact, self.address, self.customer_key))
+                if db.cursor.rowcount == 0:
+                    return f"Customer '{self.customer_name}' with this contact already exists."
             return f"Customer '{self.customer_name}' added successfully."
         except sqlite3.IntegrityError as e:
             return f"Database error: {e}"
@@ -535,14 +1700,14 @@ class Customers(CRUD):
             if not str(customer_id).isdigit():
                 raise ValueError("Customer ID must be a number.")
 
-            db.cursor.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
-            customer = db.cursor.fetchone()
-            if customer:
-                db.cursor.execute("DELETE FROM customers WHERE customer_id = ?", (customer_id,))
-                db.conn.commit()
-                return f"Customer with ID {customer_id} deleted successfully."
-            else:
-                return f"No customer found with ID {customer_id}."
+            with db.transaction():
+                db.cursor.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
+                customer = db.cursor.fetchone()
+                if customer:
+                    db.cursor.execute("DELETE FROM customers WHERE customer_id = ?", (customer_id,))
+                    return f"Customer with ID {customer_id} deleted successfully."
+                else:
+                    return f"No customer found with ID {customer_id}."
         except ValueError as e:
             return str(e)
         except sqlite3.Error as e:
@@ -550,6 +1715,12 @@ class Customers(CRUD):
         except Exception as e:
             return f"Unexpected error: {e}"
 
+    @staticmethod
+    def delete_many(ids, db) -> tuple[bool, dict | str]:
+        """Delete several customers at once; customers with orders are left in place."""
+        return CRUD._delete_many(db, "customers", "customer_id", ids,
+                                 [("orders", "customer_id", "order(s)")])
+
     def update_method(self, db, customer_id, updates: dict):
         try:
             if not updates:
@@ -565,21 +1736,28 @@ class Customers(CRUD):
                 if col == "customer_name" and (not value.strip() or value.isdigit()):
                     raise ValueError("Customer name cannot be empty or a number.")
 
-            db.cursor.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
-            existing = db.cursor.fetchone()
-            if not existing:
-                return f"No customer found with ID {customer_id}."
+            with db.transaction():
+                db.cursor.execute("SELECT customer_name, contact FROM customers WHERE customer_id = ?", (customer_id,))
+                existing = db.cursor.fetchone()
+                if not existing:
+                    return f"No customer found with ID {customer_id}."
+
+                # Keep the lookup key in step with the name and contact
+                if "customer_name" in updates or "contact" in updates:
+                    updates["customer_key"] = customer_key(updates.get("customer_name", existing[0]),
+                                                           updates.get("contact", existing[1]))
 
-            set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
-            values = list(updates.values())
-            values.append(customer_id)
+                set_clause = ", ".join([f"{col} = ?" for col in updates.keys()])
+                values = list(updates.values())
+                values.append(customer_id)
 
-            query = f"UPDATE customers SET {set_clause} WHERE customer_id = ?"
-            db.cursor.execute(query, values)
-            db.conn.commit()
+                query = f"UPDATE customers SET {set_clause} WHERE customer_id = ?"
+                db.cursor.execute(query, values)
             return f"Customer with ID {customer_id} updated successfully."
         except ValueError as e:
             return str(e)
+        except sqlite3.IntegrityError:
+            return "Another customer already has this name and contact number."
         except sqlite3.Error as e:
             return f"Database error: {e}"
         except Exception as e:
@@ -587,33 +1765,32 @@ class Customers(CRUD):
 
     def view_method(self, db, choice="all", name=None, customer_id=None):
         try:
-            db.cursor.execute("PRAGMA table_info(customers)")
-            columns = [col[1] for col in db.cursor.fetchall()]
-
             if choice.lower() not in ["all", "one"]:
                 raise ValueError("Choice must be either 'all' or 'one'.")
 
+            cursor = db.record_cursor(CustomerRecord)
+
             if choice.lower() == "one":
                 if customer_id is not None:
                     if not str(customer_id).isdigit():
                         raise ValueError("Customer ID must be numeric.")
-                    db.cursor.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
+                    cursor.execute("SELECT * FROM customers WHERE customer_id = ?", (customer_id,))
                 elif name:
-                    db.cursor.execute("SELECT * FROM customers WHERE customer_name LIKE ?", (f"%{name}%",))
+                    cursor.execute("SELECT * FROM customers WHERE customer_name LIKE ?", (f"%{name}%",))
                 else:
                     raise ValueError("Provide either 'name' or 'customer_id' to view a customer.")
 
-                result = db.cursor.fetchall()
+                result = cursor.fetchall()
                 if result:
-                    return [dict(zip(columns, row)) for row in result]
+                    return result
                 else:
                     return "No customer found matching your criteria."
 
             else:
-                db.cursor.execute("SELECT * FROM customers")
-                result = db.cursor.fetchall()
+                cursor.execute("SELECT * FROM customers")
+                result = cursor.fetchall()
                 if result:
-                    return [dict(zip(columns, row)) for row in result]
+                    return result
                 else:
                     return "No customers found in database."
 
@@ -626,24 +1803,33 @@ class Customers(CRUD):
 
 
 class Order:
+    # Order lines keep the SRP and capital in effect when they are first added;
+    # adding a product that is already on the order raises its quantity
+    INSERT_ITEM = """
+        INSERT INTO order_items (order_id, product_id, quantity, unit_price, unit_cost)
+        VALUES (?, ?, ?,
+                (SELECT srp FROM products WHERE product_id = ?),
+                (SELECT capital FROM products WHERE product_id = ?))
+        ON CONFLICT (order_id, product_id) DO UPDATE SET quantity = quantity + excluded.quantity
+    """
+
     # ===== CREATE CUSTOMER =====
     def create_customer(self, customer: 'Customers', db: 'Database') -> tuple[bool, int | str]:
+        """
+        Return the ID of the customer with customer's normalized key,
+        inserting them first if they are new. New and returning customers
+        alike cost one INSERT ... RETURNING: on a key conflict the no-op
+        DO UPDATE makes RETURNING yield the existing row's ID.
+        """
         try:
-            db.cursor.execute("""
-                SELECT customer_id FROM customers
-                WHERE customer_name = ? AND contact = ? AND address = ?
-            """, (customer.customer_name, customer.contact, customer.address))
-            existing = db.cursor.fetchone()
-
-            if existing:
-                return True, existing[0] 
-
-            db.cursor.execute("""
-                INSERT INTO customers (customer_name, contact, address)
-                VALUES (?, ?, ?)
-            """, (customer.customer_name, customer.contact, customer.address))
-            db.conn.commit()
-            return True, db.cursor.lastrowid 
+            with db.transaction():
+                db.cursor.execute("""
+                    INSERT INTO customers (customer_name, contact, address, customer_key)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (customer_key) DO UPDATE SET customer_key = excluded.customer_key
+                    RETURNING customer_id
+                """, (customer.customer_name, customer.contact, customer.address, customer.customer_key))
+                return True, db.cursor.fetchone()[0]
         except sqlite3.Error as e:
             return False, f"Failed to create customer: {e}"
 
@@ -651,11 +1837,11 @@ class Order:
     def create_order(self, customer_id: int, db: 'Database') -> tuple[bool, int | str]:
         try:
             order_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            db.cursor.execute("""
-                INSERT INTO orders (customer_id, order_date)
-                VALUES (?, ?)
-            """, (customer_id, order_date))
-            db.conn.commit()
+            with db.transaction():
+                db.cursor.execute("""
+                    INSERT INTO orders (customer_id, order_date)
+                    VALUES (?, ?)
+                """, (customer_id, order_date))
             return True, db.cursor.lastrowid
         except sqlite3.Error as e:
             return False, f"Failed to create order: {e}"
@@ -663,39 +1849,51 @@ class Order:
     # ===== ADD ORDER ITEM =====
     def add_order_item(self, order_id: int, product_id: int, quantity: int, db: 'Database') -> tuple[bool, str]:
         try:
-            db.cursor.execute("""
-                SELECT quantity FROM order_items
-                WHERE order_id = ? AND product_id = ?
-            """, (order_id, product_id))
-            existing = db.cursor.fetchone()
-
-            if existing:
-                new_quantity = existing[0] + quantity
-                db.cursor.execute("""
-                    UPDATE order_items
-                    SET quantity = ?
-                    WHERE order_id = ? AND product_id = ?
-                """, (new_quantity, order_id, product_id))
-                message = f"Updated product {product_id} to quantity {new_quantity}."
-            else:
-                db.cursor.execute("""
-                    INSERT INTO order_items (order_id, product_id, quantity)
-                    VALUES (?, ?, ?)
-                """, (order_id, product_id, quantity))
-                message = f"Added product {product_id} (x{quantity}) to order {order_id}."
+            with db.transaction():
+                db.cursor.execute(self.INSERT_ITEM + " RETURNING quantity",
+                                  (order_id, product_id, quantity, product_id, product_id))
+                new_quantity = db.cursor.fetchone()[0]
 
-            db.conn.commit()
-            return True, message
+            if new_quantity != quantity:
+                return True, f"Updated product {product_id} to quantity {new_quantity}."
+            return True, f"Added product {product_id} (x{quantity}) to order {order_id}."
 
         except sqlite3.IntegrityError as e:
             return False, f"Integrity error: {e}"
         except sqlite3.Error as e:
             return False, f"Failed to add order item: {e}"
 
+    # ===== ADD ORDER ITEMS (WHOLE CART) =====
+    def add_order_items(self, order_id: int, items, db: 'Database') -> tuple[bool, str]:
+        """
+        Add a whole cart to an order with one executemany of the line upsert.
+
+        Args:
+            items: {product_id: quantity} or an iterable of (product_id, quantity).
+        """
+        try:
+            pairs = list(items.items() if isinstance(items, dict) else items)
+            if not pairs:
+                return False, "No items to add."
+
+            with db.transaction():
+                db.cursor.executemany(self.INSERT_ITEM, [
+                    (order_id, product_id, quantity, product_id, product_id)
+                    for product_id, quantity in pairs
+                ])
+            return True, f"Added {len(pairs)} line(s) to order {order_id}."
+
+        except (TypeError, ValueError) as e:
+            return False, f"Invalid cart: {e}"
+        except sqlite3.IntegrityError as e:
+            return False, f"Integrity error: {e}"
+        except sqlite3.Error as e:
+            return False, f"Failed to add order items: {e}"
+
 class DailyFinancials:
     # ===== FETCH DETAILED ORDERS =====
     @staticmethod
-    def fetch_orders_report(db: 'Database') -> tuple[bool, list[tuple] | str]:
+    def fetch_orders_report(db: 'Database', formatted: bool = False) -> tuple[bool, list[tuple] | str]:
         """
         Fetches full order history for all orders.
         Returns:
@@ -703,6 +1901,8 @@ class DailyFinancials:
             (False, error message) on failure
         Each tuple contains:
             (order_id, order_date, customer_name, contact, address, product_name, srp, quantity, total_price)
+        where srp is the unit price recorded when the item was sold.
+        srp and total_price are numbers, or ₱ strings when formatted=True.
         """
         try:
             query = """
@@ -713,9 +1913,9 @@ class DailyFinancials:
                     c.contact,
                     c.address,
                     p.product_name,
-                    p.srp,
+                    oi.unit_price AS srp,
                     oi.quantity,
-                    (oi.quantity * p.srp) AS total_price
+                    (oi.quantity * oi.unit_price) AS total_price
                 FROM order_items AS oi
                 INNER JOIN orders AS o ON oi.order_id = o.order_id
                 INNER JOIN customers AS c ON o.customer_id = c.customer_id
@@ -725,48 +1925,41 @@ class DailyFinancials:
             db.cursor.execute(query)
             rows = db.cursor.fetchall()
 
-            formatted_rows = []
-            for r in rows:
-                r = list(r)
+            if formatted:
                 # srp=6, total_price=8
-                r[6] = f"₱{r[6]:,.2f}"         # srp
-                r[8] = f"₱{r[8]:,.2f}"         # total_price
-                formatted_rows.append(tuple(r))
+                rows = [r[:6] + (peso(r[6]), r[7], peso(r[8])) for r in rows]
 
-            return True, formatted_rows
+            return True, rows
 
         except sqlite3.Error as e:
             return False, f"Failed to fetch order history: {e}"
 
     # ===== SUMMARIZE DAILY SALES =====
     @staticmethod
-    def summarize_daily_sales(db: 'Database') -> tuple[bool, list[tuple] | str]:
+    def summarize_daily_sales(db: 'Database', formatted: bool = False) -> tuple[bool, list[tuple] | str]:
         """
         Fetches daily sales totals.
         Returns list of tuples:
             (order_day, total_sales)
-        total_sales is formatted with ₱, commas, and 2 decimals.
+        total_sales is a number, or formatted with ₱, commas, and 2 decimals
+        when formatted=True.
         """
         try:
             db.cursor.execute("""
                 SELECT
                     DATE(o.order_date) AS order_day,
-                    COALESCE(SUM(oi.quantity * p.srp), 0) AS total_sales
+                    COALESCE(SUM(oi.quantity * oi.unit_price), 0) AS total_sales
                 FROM orders AS o
                 LEFT JOIN order_items AS oi ON oi.order_id = o.order_id
-                LEFT JOIN products AS p ON oi.product_id = p.product_id
                 GROUP BY order_day
                 ORDER BY order_day;
             """)
             rows = db.cursor.fetchall()
-            formatted_rows = []
 
-            for r in rows:
-                order_day, total_sales = r
-                formatted_total = f"₱{total_sales:,.2f}"
-                formatted_rows.append((order_day, formatted_total))
+            if formatted:
+                rows = [(order_day, peso(total_sales)) for order_day, total_sales in rows]
 
-            return True, formatted_rows
+            return True, rows
 
         except sqlite3.Error as e:
             return False, f"Failed to summarize daily sales: {e}"
@@ -774,7 +1967,12 @@ class DailyFinancials:
 
 class Financials:
     @staticmethod
-    def calculate_monthly_financials(db: 'Database', month_to_update: str = None, operating_expenses: float = None, taxes: float = None) -> tuple:
+    def calculate_monthly_financials(db: 'Database', month_to_update: str = None, operating_expenses: float = None, taxes: float = None,
+                                     formatted: bool = False) -> tuple:
+        """
+        Recompute monthly_financials from the orders and return one dict per
+        month. Amounts are numbers, or ₱ strings when formatted=True.
+        """
         try:
             results = []
             if not operating_expenses:
@@ -785,128 +1983,197 @@ class Financials:
                 return False, "Operating expenses must be a numeric value."
             if isinstance(taxes, str):
                 return False, "Taxes must be a numeric value."
-            # Fetch monthly sales and capital
-            db.cursor.execute('''
-                SELECT 
-                    SUBSTR(o.order_date, 1, 7) AS month,
-                    SUM(oi.quantity * p.srp) AS total_sales,
-                    SUM(oi.quantity * p.capital) AS total_capital
-                FROM order_items AS oi
-                JOIN orders AS o ON oi.order_id = o.order_id
-                JOIN products AS p ON oi.product_id = p.product_id
-                GROUP BY month
-            ''')
-            monthly_data = db.cursor.fetchall()
-
-            for row in monthly_data:
-                month, total_sales, total_capital = row
-                gross_profit = total_sales - total_capital
-
-                # Fetch existing expenses/taxes
+            with db.transaction():
+                # Fetch monthly sales and capital
                 db.cursor.execute('''
-                    SELECT operating_expenses, taxes
-                    FROM monthly_financials
-                    WHERE month = ?
-                ''', (month,))
-                existing = db.cursor.fetchone()
-                current_expenses = existing[0] if existing else 0
-                current_taxes = existing[1] if existing else 0
-
-                # Determine which expenses/taxes to use
-                if month_to_update and month == month_to_update:
-                    op_exp = float(operating_expenses)
-                    tx = float(taxes)
-                else:
-                    op_exp = current_expenses
-                    tx = current_taxes
-
-                operating_profit = gross_profit - op_exp
-                net_profit = operating_profit - tx
+                    SELECT 
+                        SUBSTR(o.order_date, 1, 7) AS month,
+                        SUM(oi.quantity * oi.unit_price) AS total_sales,
+                        SUM(oi.quantity * oi.unit_cost) AS total_capital
+                    FROM order_items AS oi
+                    JOIN orders AS o ON oi.order_id = o.order_id
+                    GROUP BY month
+                ''')
+                monthly_data = db.cursor.fetchall()
+
+                for row in monthly_data:
+                    month, total_sales, total_capital = row
+                    gross_profit = total_sales - total_capital
+
+                    # Fetch existing expenses/taxes
+                    db.cursor.execute('''
+                        SELECT operating_expenses, taxes
+                        FROM monthly_financials
+                        WHERE month = ?
+                    ''', (month,))
+                    existing = db.cursor.fetchone()
+                    current_expenses = existing[0] if existing else 0
+                    current_taxes = existing[1] if existing else 0
+
+                    # Determine which expenses/taxes to use
+                    if month_to_update and month == month_to_update:
+                        op_exp = float(operating_expenses)
+                        tx = float(taxes)
+                    else:
+                        op_exp = current_expenses
+                        tx = current_taxes
+
+                    operating_profit = gross_profit - op_exp
+                    net_profit = operating_profit - tx
+
+                    # Insert or update monthly_financials
+                    db.cursor.execute('''
+                        INSERT INTO monthly_financials
+                        (month, total_sales, total_capital, gross_profit, operating_expenses, taxes, operating_profit, net_profit)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT(month) DO UPDATE SET
+                            total_sales = excluded.total_sales,
+                            total_capital = excluded.total_capital,
+                            gross_profit = excluded.gross_profit,
+                            operating_expenses = ?,
+                            taxes = ?,
+                            operating_profit = excluded.operating_profit,
+                            net_profit = excluded.net_profit
+                    ''', (month, total_sales, total_capital, gross_profit, op_exp, tx, operating_profit, net_profit, op_exp, tx))
+
+                    result = {
+                        'month': month,
+                        'total_sales': total_sales,
+                        'total_capital': total_capital,
+                        'gross_profit': gross_profit,
+                        'operating_expenses': op_exp,
+                        'taxes': tx,
+                        'operating_profit': operating_profit,
+                        'net_profit': net_profit
+                    }
+                    if formatted:
+                        result = {key: value if key == 'month' else peso(value) for key, value in result.items()}
+
+                    results.append(result)
 
-                # Insert or update monthly_financials
-                db.cursor.execute('''
-                    INSERT INTO monthly_financials
-                    (month, total_sales, total_capital, gross_profit, operating_expenses, taxes, operating_profit, net_profit)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                    ON CONFLICT(month) DO UPDATE SET
-                        total_sales = excluded.total_sales,
-                        total_capital = excluded.total_capital,
-                        gross_profit = excluded.gross_profit,
-                        operating_expenses = ?,
-                        taxes = ?,
-                        operating_profit = excluded.operating_profit,
-                        net_profit = excluded.net_profit
-                ''', (month, total_sales, total_capital, gross_profit, op_exp, tx, operating_profit, net_profit, op_exp, tx))
-
-                # --- Format numeric values for display ---
-                formatted_result = {
-                    'month': month,
-                    'total_sales': f"₱{total_sales:,.2f}",
-                    'total_capital': f"₱{total_capital:,.2f}",
-                    'gross_profit': f"₱{gross_profit:,.2f}",
-                    'operating_expenses': f"₱{op_exp:,.2f}",
-                    'taxes': f"₱{tx:,.2f}",
-                    'operating_profit': f"₱{operating_profit:,.2f}",
-                    'net_profit': f"₱{net_profit:,.2f}"
-                }
-
-                results.append(formatted_result)
-
-            db.conn.commit()
             return True, results
 
         except sqlite3.Error as e:
             return False, f"Failed to calculate monthly financials: {e}"
     
 class InventoryManager(Order):
-    def checkout_order(self, order_id: int, db: 'Database') -> tuple[bool, str]:
-        try:
-            # Get all items in this order
-            db.cursor.execute("""
-                SELECT product_id, quantity
+    def _deduct_stock(self, order_id: int, db: 'Database'):
+        """
+        Verify and deduct the stock for every item of order_id and log the
+        sales. Runs inside the caller's transaction; raises ValueError, naming
+        every item that cannot be filled, so the caller rolls everything back.
+
+        Stock is checked with one joined query and deducted with one UPDATE,
+        however many lines the order has.
+        """
+        # Availability of every product on the order, repeated lines combined
+        db.cursor.execute("""
+            SELECT oi.product_id, SUM(oi.quantity), p.quantity, p.product_name
+            FROM order_items AS oi
+            LEFT JOIN products AS p ON p.product_id = oi.product_id
+            WHERE oi.order_id = ?
+            GROUP BY oi.product_id
+        """, (order_id,))
+        order_items = db.cursor.fetchall()
+
+        if not order_items:
+            raise ValueError(f"No order items found for order ID {order_id}.")
+
+        problems = []
+        for product_id, order_qty, available_qty, name in order_items:
+            if available_qty is None:
+                problems.append(f"Product ID {product_id} does not exist.")
+            elif available_qty < order_qty:
+                problems.append(f"Insufficient stock for '{name}' (ID {product_id}): "
+                                f"ordered {order_qty}, only {available_qty} left.")
+        if problems:
+            raise ValueError("\n".join(problems))
+
+        # Deduct every line at once; the quantity guard makes a concurrent sale show up as a short count
+        db.cursor.execute("""
+            UPDATE products
+            SET quantity = products.quantity - d.ordered,
+                total_capital = ROUND((products.quantity - d.ordered) * products.capital, 2)
+            FROM (
+                SELECT product_id, SUM(quantity) AS ordered
                 FROM order_items
                 WHERE order_id = ?
-            """, (order_id,))
-            order_items = db.cursor.fetchall()
+                GROUP BY product_id
+            ) AS d
+            WHERE products.product_id = d.product_id AND products.quantity >= d.ordered
+        """, (order_id,))
 
-            if not order_items:
-                return False, f"No order items found for order ID {order_id}."
+        if db.cursor.rowcount != len(order_items):
+            raise ValueError(f"Failed to update stock for order ID {order_id}. Not enough quantity.")
 
-            # Verify product availability
-            for product_id, order_qty in order_items:
-                db.cursor.execute("""
-                    SELECT quantity, product_name
-                    FROM products
-                    WHERE product_id = ?
-                """, (product_id,))
-                product = db.cursor.fetchone()
+        StockLedger.record_from(db, "sale", """
+            SELECT product_id, -quantity AS quantity_change, order_id
+            FROM order_items WHERE order_id = ?
+        """, (order_id,))
+
+    def checkout_order(self, order_id: int, db: 'Database') -> tuple[bool, str]:
+        try:
+            with db.transaction():
+                self._deduct_stock(order_id, db)
+
+            return True, f"Checkout successful! Inventory updated for order ID {order_id}."
+
+        except ValueError as e:
+            return False, str(e)
+        except sqlite3.Error as e:
+            return False, f"Checkout failed: {e}"
 
-                if not product:
-                    return False, f"Product ID {product_id} does not exist."
+    # ===== CHECKOUT CART =====
+    def checkout(self, customer: 'Customers', cart, db: 'Database') -> tuple[bool, dict | str]:
+        """
+        Sell a cart to a customer as one unit of work.
+
+        The customer lookup/insert, the order, its items and the stock
+        deduction all happen in a single transaction, so a failure at any
+        step (e.g. insufficient stock) leaves no order behind.
+
+        Args:
+            customer (Customers): The buyer; an existing matching customer is reused.
+            cart: {product_id: quantity} or an iterable of (product_id, quantity);
+                repeated products are combined.
 
-                available_qty, name = product
-                if available_qty < order_qty:
-                    return False, f"Insufficient stock for '{name}' (ID {product_id}). Only {available_qty} left."
+        Returns:
+            (True, {"order_id": int, "customer_id": int, "items": {product_id: quantity}})
+            or (False, error message)
+        """
+        try:
+            pairs = cart.items() if isinstance(cart, dict) else cart
+            items = {}
+            for product_id, quantity in pairs:
+                product_id, quantity = int(product_id), int(quantity)
+                if quantity <= 0:
+                    raise ValueError(f"Quantity for product ID {product_id} must be greater than zero.")
+                items[product_id] = items.get(product_id, 0) + quantity
+            if not items:
+                raise ValueError("Cart is empty.")
+
+            with db.transaction():
+                success, customer_id = self.create_customer(customer, db)
+                if not success:
+                    raise ValueError(customer_id)
 
-            # Deduct quantities safely from inventory 
-            for product_id, order_qty in order_items:
                 db.cursor.execute("""
-                    UPDATE products
-                    SET quantity = quantity - ?
-                    WHERE product_id = ? AND quantity >= ?
-                """, (order_qty, product_id, order_qty))
+                    INSERT INTO orders (customer_id, order_date)
+                    VALUES (?, ?)
+                """, (customer_id, datetime.now().strftime("%Y-%m-%d %H:%M:%S")))
+                order_id = db.cursor.lastrowid
 
-                # Check if the update actually succeeded 
-                if db.cursor.rowcount == 0:
-                    db.conn.rollback()
-                    return False, f"Failed to update stock for product ID {product_id}. Not enough quantity."
+                success, message = self.add_order_items(order_id, items, db)
+                if not success:
+                    raise ValueError(message)
 
-            # Commit all changes
-            db.conn.commit()
-            return True, f"Checkout successful! Inventory updated for order ID {order_id}."
+                self._deduct_stock(order_id, db)
+
+            return True, {"order_id": order_id, "customer_id": customer_id, "items": items}
 
+        except (TypeError, ValueError) as e:
+            return False, str(e)
         except sqlite3.Error as e:
-            db.conn.rollback()
             return False, f"Checkout failed: {e}"
 
     
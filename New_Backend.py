@@ -1,6 +1,10 @@
 from datetime import datetime
+import json
 import sqlite3
+import time
 from abc import ABC, abstractmethod
+from migrations import migrate, HNC_MIGRATIONS
+from sql_profiler import QueryProfiler, ProfiledCursor
 
 class CRUD(ABC):
     """In this class, we define the abstract methods for CRUD operations."""
@@ -25,11 +29,36 @@ class Database:
     This class manages the SQLite database connection and cursor.
     
     It supports context manager protocol for automatic commit and close.
+    Pending schema migrations are applied when the connection is opened.
     """
 
-    def __init__(self):
-        self.conn = sqlite3.connect("HNC_DB.db")
-        self.cursor = self.conn.cursor()
+    def __init__(self, database_name="HNC_DB.db", profile=False, slow_query_ms=None):
+        self.conn = sqlite3.connect(database_name)
+        self._cursor = self.conn.cursor()
+        self.profiler = QueryProfiler(slow_ms=slow_query_ms)
+        self._profiled_cursor = ProfiledCursor(self._cursor, self.profiler)
+        if profile:
+            self.profiler.enable()
+        migrate(self.conn, HNC_MIGRATIONS)
+
+    @property
+    def cursor(self):
+        """
+        The connection's cursor, wrapped for timing only while profiling is on.
+
+        Returns:
+            sqlite3.Cursor | ProfiledCursor: The cursor to execute statements on.
+        """
+        return self._profiled_cursor if self.profiler.enabled else self._cursor
+
+    def query_stats(self):
+        """
+        Per-statement timings collected while profiling was enabled.
+
+        Returns:
+            list[dict]: p50/p95/max timings, row counts and callers per normalized SQL text.
+        """
+        return self.profiler.stats()
 
     def __enter__(self):
         """
@@ -478,10 +507,29 @@ class Order:
 
         
 class SellProducts:
-    """Handles selling products using Order and Product classes."""
+    """
+    Handles selling products using Order and Product classes.
+
+    The cart is a dict keyed by product_id, so scanning, updating or removing
+    a line costs the same however long the cart gets, and the item and price
+    totals are adjusted as lines change instead of being re-summed. Prices are
+    kept in centavos internally so the running total never drifts.
+
+    Quantities are checked against a snapshot of the stock on hand taken by
+    refresh_stock(). Once the snapshot is older than stock_ttl seconds it is
+    dropped and the pre-check is skipped until the next refresh. At checkout
+    the cart's own products are read from the database again. This screen
+    records orders only and does not move stock, so the snapshot is left as
+    it is after a sale.
+    """
 
-    def __init__(self):
-        self.cart = []  # Each item: dict with product_id, name, quantity, price
+    def __init__(self, stock_ttl: float = 30):
+        self.cart = {}  # product_id -> dict with product_id, name, quantity, price, subtotal
+        self.total_items = 0
+        self._total_cents = 0
+        self.stock_ttl = stock_ttl
+        self._stock = None       # product_id -> quantity on hand, or None until loaded
+        self._stock_loaded = 0.0
 
     @staticmethod
     def fetch_products(db: 'Database'):
@@ -502,32 +550,135 @@ class SellProducts:
         except Exception as e:
             return ["Error"], [[f"Database error: {e}"]]
 
+    # ===== STOCK SNAPSHOT =====
+    def refresh_stock(self, db: 'Database', force: bool = False) -> tuple[bool, str]:
+        """
+        Load the quantity on hand of every product, unless the current snapshot
+        is younger than stock_ttl seconds.
+
+        Parameters:
+            db (Database): Database connection object.
+            force (bool): Reload even if the snapshot is still fresh.
+
+        """
+        if not force and self._stock is not None and time.monotonic() - self._stock_loaded < self.stock_ttl:
+            return True, "Stock snapshot is up to date."
+        try:
+            db.cursor.execute("SELECT product_id, quantity FROM products")
+            self._stock = dict(db.cursor.fetchall())
+            self._stock_loaded = time.monotonic()
+            return True, f"Loaded stock for {len(self._stock)} products."
+        except sqlite3.Error as e:
+            return False, f"Failed to load stock: {e}"
+
+    def _fresh_stock(self):
+        if self._stock is not None and time.monotonic() - self._stock_loaded >= self.stock_ttl:
+            self._stock = None  # too old to trust
+        return self._stock
+
+    def available(self, product_id: int):
+        """Quantity on hand in the snapshot, or None when no fresh snapshot is loaded."""
+        stock = self._fresh_stock()
+        if stock is None:
+            return None
+        return stock.get(product_id, 0)
+
+    def _stock_problem(self, product_id: int, name: str, quantity: int, on_hand: dict = None):
+        available = on_hand.get(product_id, 0) if on_hand is not None else self.available(product_id)
+        if available is not None and quantity > available:
+            return f"Only {available} of {name} in stock."
+        return None
+
+    # ===== CART =====
+    @staticmethod
+    def _cents(amount) -> int:
+        return int(round(float(amount) * 100))
+
+    def _set_line(self, item: dict, quantity: int, price: float):
+        old_cents = self._cents(item["subtotal"])
+        item["quantity"] = quantity
+        item["price"] = price
+        item["subtotal"] = round(price * quantity, 2)
+        self._total_cents += self._cents(item["subtotal"]) - old_cents
+
     def add_to_cart(self, product_id: int, name: str, price: float, quantity: int = 1):
         """
         Add a product to the cart. Updates quantity if already exists.
         """
-        for item in self.cart:
-            if item["product_id"] == product_id:
-                item["quantity"] += quantity
-                item["subtotal"] = round(item["quantity"] * item["price"], 2)
-                return f"Updated {name} quantity to {item['quantity']}."
-        
-        self.cart.append({
-            "product_id": product_id,
-            "name": name,
-            "price": price,
-            "quantity": quantity,
-            "subtotal": round(price * quantity, 2)
-        })
+        if quantity <= 0:
+            return "Quantity must be greater than zero."
+
+        item = self.cart.get(product_id)
+        new_quantity = quantity + (item["quantity"] if item else 0)
+        problem = self._stock_problem(product_id, name, new_quantity)
+        if problem:
+            return problem
+
+        self.total_items += quantity
+        if item:
+            self._set_line(item, new_quantity, item["price"])
+            return f"Updated {name} quantity to {item['quantity']}."
+
+        self.cart[product_id] = item = {"product_id": product_id, "name": name,
+                                        "price": price, "quantity": 0, "subtotal": 0.0}
+        self._set_line(item, quantity, price)
         return f"Added {name} (x{quantity}) to cart."
 
+    def update_quantity(self, product_id: int, quantity: int):
+        """
+        Set the quantity of a cart line; zero removes it.
+        """
+        item = self.cart.get(product_id)
+        if item is None:
+            return f"Product {product_id} is not in the cart."
+        if quantity < 0:
+            return "Quantity cannot be negative."
+        if quantity == 0:
+            return self.remove_from_cart(product_id)
+
+        problem = self._stock_problem(product_id, item["name"], quantity)
+        if problem:
+            return problem
+
+        self.total_items += quantity - item["quantity"]
+        self._set_line(item, quantity, item["price"])
+        return f"Updated {item['name']} quantity to {quantity}."
+
+    def update_price(self, product_id: int, price: float):
+        """
+        Change the unit price of a cart line, e.g. for a discount.
+        """
+        item = self.cart.get(product_id)
+        if item is None:
+            return f"Product {product_id} is not in the cart."
+        if price < 0:
+            return "Price cannot be negative."
+
+        self._set_line(item, item["quantity"], price)
+        return f"Updated {item['name']} price to ₱{price:,.2f}."
+
+    def remove_from_cart(self, product_id: int):
+        """
+        Remove a line from the cart.
+        """
+        item = self.cart.pop(product_id, None)
+        if item is None:
+            return f"Product {product_id} is not in the cart."
+
+        self.total_items -= item["quantity"]
+        self._total_cents -= self._cents(item["subtotal"])
+        return f"Removed {item['name']} from cart."
+
+    def clear_cart(self):
+        self.cart.clear()
+        self.total_items = 0
+        self._total_cents = 0
+
     def cart_summary(self):
         """
         Return the total items and total price in the cart.
         """
-        total_items = sum(item["quantity"] for item in self.cart)
-        total_price = sum(item["subtotal"] for item in self.cart)
-        return total_items, round(total_price, 2)
+        return self.total_items, self._total_cents / 100
 
     def checkout(self, customer: 'Customers', db: 'Database'):
         """
@@ -537,6 +688,23 @@ class SellProducts:
         if not self.cart:
             return False, "Cart is empty."
 
+        # Check the cart's products against current stock before writing anything
+        try:
+            db.cursor.execute("""
+                SELECT product_id, quantity FROM products
+                WHERE product_id IN (SELECT value FROM json_each(?))
+            """, (json.dumps(list(self.cart)),))
+            on_hand = dict(db.cursor.fetchall())
+        except sqlite3.Error as e:
+            return False, f"Failed to check stock: {e}"
+
+        problems = [problem for item in self.cart.values()
+                    if (problem := self._stock_problem(item["product_id"], item["name"], item["quantity"], on_hand))]
+        if problems:
+            return False, "\n".join(problems)
+        if self._fresh_stock() is not None:
+            self._stock.update(on_hand)
+
         order_handler = Order()
 
         # Create or fetch customer
@@ -551,7 +719,7 @@ class SellProducts:
 
         # Add each cart item
         messages = []
-        for item in self.cart:
+        for item in self.cart.values():
             success, msg = order_handler.add_order_item(
                 order_id, item["product_id"], item["quantity"], db
             )
@@ -559,10 +727,10 @@ class SellProducts:
             if not success:
                 return False, f"Failed to add product {item['name']}: {msg}"
 
-        # Clear cart after checkout
-        self.cart.clear()
-
+        # Summarize before the cart is cleared
         total_items, total_price = self.cart_summary()
+        self.clear_cart()
+
         summary = f"Order {order_id} completed successfully. Total items: {total_items}, Total price: ₱{total_price:,.2f}\nDetails:\n" + "\n".join(messages)
         return True, summary
 
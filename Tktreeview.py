@@ -1,6 +1,10 @@
 from tkinter import *
 from tkinter import messagebox
+from tkinter import filedialog
+from tkinter import simpledialog
 from MNE import *  
+from backend_worker import BackendWorker
+from formatting import peso, number, format_values
 from tkinter import ttk
 from tkcalendar import DateEntry
 from cryptography.fernet import Fernet
@@ -11,7 +15,9 @@ gui.title("JOMAR & CARLO")
 img = PhotoImage(file= r"C:\Users\ACER\OneDrive\Desktop\OOP PROJECT\logo.png")
 gui.iconphoto(True, img)
 
-db = Database()
+db = Database.shared()
+worker = BackendWorker(gui)  # runs backend queries off the Tk thread
+worker.submit(StockLedger.snapshot_if_due, db)  # monthly stock snapshot for quantity_at
 def create_labeled_entries(parent, fields, date_fields=None, product=None):
     if date_fields is None:
         date_fields = ["Date Received (YYYY-MM-DD)", "Expiration Date (YYYY-MM-DD)"]
@@ -126,14 +132,17 @@ def DashBoard():
     salesCard, salesFrame = rounded_frame(section, 250, 150, radius=25, bg="#1E88E5")
     userCard, userFrame = rounded_frame(section, 250, 150, radius=25, bg="#1E88E5")
     prodCard, prodFrame = rounded_frame(section, 250, 150, radius=25, bg="#1E88E5")
+    expiryCard, expiryFrame = rounded_frame(section, 250, 150, radius=25, bg="#E53935")
+    valueCard, valueFrame = rounded_frame(section, 250, 150, radius=25, bg="#1E88E5")
 
     salesCard.grid(row=0, column=0, padx=10, pady=10)
     userCard.grid(row=0, column=1, padx=10, pady=10)
     prodCard.grid(row=0, column=2, padx=10, pady=10)
+    expiryCard.grid(row=1, column=0, padx=10, pady=10)
+    valueCard.grid(row=1, column=1, padx=10, pady=10)
 
     # Database values
-    db = sqlite3.connect("Hardware and Construction.db")
-    cs = db.cursor()
+    cs = db.cursor
 
     cs.execute("SELECT SUM(total_sales) FROM monthly_financials")
     total_sales = cs.fetchone()[0] or 0
@@ -142,11 +151,18 @@ def DashBoard():
     cs.execute("SELECT COUNT(*) FROM users")
     user_count = cs.fetchone()[0]
 
-    cs.execute("SELECT COUNT(*) FROM products")
-    product_count = cs.fetchone()[0]
+    # Product count and stock value come from the trigger-maintained summary
+    success, valuation = InventoryValuation.totals(db)
+    if not success:
+        valuation = {"product_count": 0, "units": 0, "total_capital": 0, "retail_value": 0}
+    product_count = valuation["product_count"]
+
+    success, alerts = ExpiryScanner.alert_counts(db, within_days=30)
+    if not success:
+        alerts = {"expiring": 0, "expired": 0, "past_lifespan": 0}
 
     # Labels
-    Label(salesFrame, text=f"₱ {total_sales}\nSales", fg="white", bg="#1E88E5",
+    Label(salesFrame, text=f"{peso(total_sales)}\nSales", fg="white", bg="#1E88E5",
           font=("Arial", 22, "bold")).pack(expand=True)
 
     Label(userFrame, text=f"👤 {user_count}\nActive Users", fg="white", bg="#1E88E5",
@@ -155,6 +171,16 @@ def DashBoard():
     Label(prodFrame, text=f"{product_count}\nProducts Available", fg="white", bg="#1E88E5",
           font=("Arial", 18, "bold")).pack(expand=True)
 
+    Label(expiryFrame, text=f"⚠ {alerts['expiring']}\nExpiring in 30 Days", fg="white", bg="#E53935",
+          font=("Arial", 18, "bold")).pack(expand=True)
+    Label(expiryFrame, text=f"{alerts['expired']} expired · {alerts['past_lifespan']} past lifespan",
+          fg="white", bg="#E53935", font=("Arial", 11)).pack()
+
+    Label(valueFrame, text=f"{peso(valuation['total_capital'])}\nStock at Cost", fg="white", bg="#1E88E5",
+          font=("Arial", 18, "bold")).pack(expand=True)
+    Label(valueFrame, text=f"{valuation['units']:,} units · {peso(valuation['retail_value'])} at SRP",
+          fg="white", bg="#1E88E5", font=("Arial", 11)).pack()
+
     
 def TreeView(frame, columns, width):
     tree = ttk.Treeview(frame, columns=columns, show="headings", selectmode= "extended")
@@ -171,6 +197,17 @@ def TreeView(frame, columns, width):
     
     return tree
 
+def delete_summary(noun, outcomes):
+    # outcomes: {id: "deleted" | reason} from a delete_many call
+    deleted = sum(1 for outcome in outcomes.values() if outcome == "deleted")
+    summary = f"Deleted {deleted} of {len(outcomes)} selected {noun}(s)."
+    skipped = [(item_id, outcome) for item_id, outcome in outcomes.items() if outcome != "deleted"]
+    if skipped:
+        details = "\n".join(f"ID {item_id}: {reason}" for item_id, reason in skipped[:15])
+        more = f"\n... and {len(skipped) - 15} more." if len(skipped) > 15 else ""
+        summary += f"\n\nNot deleted:\n{details}{more}"
+    return summary
+
 def DialogBox(title, gui, fields = None):
     dialog = Toplevel(gui)
     dialog.title(title)
@@ -193,7 +230,9 @@ def Inventory():
     # --- Left side: action buttons ---
     buttons = [
         ("Add Product", lambda: add_product_dialog()),
+        ("Import Products", lambda: import_products()),
         ("Edit Selected", lambda: edit_selected_dialog()),
+        ("Reprice Selected", lambda: reprice_selected()),
         ("Delete Selected", lambda: delete_selected()),
         ("Refresh", lambda: load_data())
     ]
@@ -205,6 +244,16 @@ def Inventory():
     msg_label = Label(inv_frame, text="", bg="#D9D9D9", fg="blue", anchor="w")
     msg_label.pack(fill="x", pady=(2, 0))
 
+    # ===== PAGER =====
+    pager = Frame(inv_frame, bg="#D9D9D9")
+    pager.pack(fill="x", pady=(2, 4))
+    prev_btn = Button(pager, text="< Prev", font=("Arial", 10, "bold"), command=lambda: prev_page())
+    prev_btn.pack(side="left", padx=3)
+    next_btn = Button(pager, text="Next >", font=("Arial", 10, "bold"), command=lambda: next_page())
+    next_btn.pack(side="left", padx=3)
+    page_label = Label(pager, text="", bg="#D9D9D9", anchor="w")
+    page_label.pack(side="left", padx=8)
+
     # ===== TREEVIEW TABLE =====
     tree_frame = Frame(inv_frame, bg="#D9D9D9")
     tree_frame.pack(fill="both", expand=True)
@@ -228,57 +277,80 @@ def Inventory():
     columns = list(header_map.values())
     tree = TreeView(tree_frame, columns, width=100)
 
+    # The backend sends numbers; only the rows put in the tree get formatted
+    formatters = {headers.index("quantity"): number, headers.index("capital"): peso,
+                  headers.index("srp"): peso, headers.index("total_capital"): peso}
+
     # ===== BACKEND PROXY =====
     def _product_proxy():
         return Product("proxy_temp", 1, 1, 1, 0.0, 1)
 
+    def show_error(e):
+        msg_label.config(text=f"Error loading data: {e}", fg="red")
+
+    # Keyset paging: cursors[i] is the "after" value that starts page i
+    PAGE_SIZE = 200
+    paging = {"cursors": [None], "page": 0, "next": None, "total": None, "keyword": ""}
+
     # ===== LOAD DATA =====
-    def load_data():
-        try:
-            tree.delete(*tree.get_children())
-            proxy = _product_proxy()
-            res = proxy.view_method(db, choice="all")
+    def load_page(page):
+        msg_label.config(text="Loading products...", fg="blue")
+        proxy = _product_proxy()
+        worker.submit(proxy.view_page, db, page_size=PAGE_SIZE, after=paging["cursors"][page],
+                      keyword=paging["keyword"] or None, with_total=(page == 0),
+                      sort="relevance" if paging["keyword"] else "product_id",
+                      key="inventory", widget=tree,
+                      on_done=lambda res: show_page(page, res), on_error=show_error)
 
-            if isinstance(res, str):
-                msg_label.config(text=res, fg="red")
-                return
+    def load_data():
+        paging["cursors"] = [None]
+        load_page(0)
 
-            for row in res:
-                tree.insert("", "end", values=[row.get(h, "") for h in headers])
+    def next_page():
+        if paging["next"] is not None:
+            load_page(paging["page"] + 1)
 
-            msg_label.config(text=f"{len(res)} product(s) loaded.", fg="green")
-        except Exception as e:
-            msg_label.config(text=f"Error loading data: {e}", fg="red")
+    def prev_page():
+        if paging["page"] > 0:
+            load_page(paging["page"] - 1)
 
-    # ===== SEARCH FUNCTION =====
-    def search_product(keyword):
-        keyword = keyword.strip()
+    def show_page(page, res):
+        success, result = res
         tree.delete(*tree.get_children())
-        proxy = _product_proxy()
-        res = proxy.view_method(db, choice="all")
 
-        if not keyword:
-            for row in res:
-                tree.insert("", "end", values=[row.get(h, "") for h in headers])
-            msg_label.config(text="Showing all products.", fg="blue")
+        if not success:
+            msg_label.config(text=result, fg="red")
             return
 
-        filtered = [
-            item for item in res
-            if keyword.lower() in str(item.get("product_name", "")).lower()
-            or keyword.lower() in str(item.get("category_name", "")).lower()
-            or keyword.lower() in str(item.get("type_name", "")).lower()
-            or keyword.lower() in str(item.get("supplier_name", "")).lower()
-            or keyword in str(item.get("date_received", ""))
-        ]
+        paging["page"] = page
+        paging["next"] = result["next"]
+        paging["cursors"] = paging["cursors"][:page + 1] + [result["next"]]
+        if result["total"] is not None:
+            paging["total"] = result["total"]
 
-        for row in filtered:
-            tree.insert("", "end", values=[row.get(h, "") for h in headers])
+        for row in result["rows"]:
+            tree.insert("", "end", values=format_values([row.get(h, "") for h in headers], formatters))
 
-        msg_label.config(
-            text=f"{len(filtered)} result(s) found for '{keyword}'." if filtered else f"No results for '{keyword}'.",
-            fg="green" if filtered else "red"
-        )
+        total = paging["total"] or 0
+        first = page * PAGE_SIZE + 1 if result["rows"] else 0
+        last = page * PAGE_SIZE + len(result["rows"])
+        page_label.config(text=f"Showing {first}-{last} of {total}")
+        prev_btn.config(state="normal" if page > 0 else "disabled")
+        next_btn.config(state="normal" if result["next"] is not None else "disabled")
+
+        keyword = paging["keyword"]
+        if keyword:
+            msg_label.config(
+                text=f"{total} result(s) found for '{keyword}'." if total else f"No results for '{keyword}'.",
+                fg="green" if total else "red"
+            )
+        else:
+            msg_label.config(text=f"{total} product(s) loaded.", fg="green")
+
+    # ===== SEARCH FUNCTION =====
+    def search_product(keyword):
+        paging["keyword"] = keyword.strip()
+        load_data()
 
     # ===== ADD PRODUCT =====
     def add_product_dialog():
@@ -307,15 +379,78 @@ def Inventory():
                     pname, category_id, type_id, quantity, capital, supplier_id,
                     date_received=date_received, expiration_date=expiration_date, lifespan=lifespan
                 )
-                msg = prod.add_method(db)
-                messagebox.showinfo("Add Product", msg)
-                dialog.destroy()
-                load_data()
+
+                def saved(msg):
+                    messagebox.showinfo("Add Product", msg)
+                    dialog.destroy()
+                    load_data()
+
+                worker.submit(prod.add_method, db, widget=dialog, on_done=saved,
+                              on_error=lambda e: messagebox.showerror("Error", str(e)))
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
         Button(dialog, text="Save Product", command=save_new).pack(pady=10)
 
+    # ===== IMPORT PRODUCTS =====
+    def import_products():
+        path = filedialog.askopenfilename(
+            title="Import Products",
+            filetypes=[("Price lists", "*.csv *.json"), ("CSV", "*.csv"), ("JSON", "*.json")]
+        )
+        if not path:
+            return
+
+        def imported(result):
+            inserted, rejects = result
+            if isinstance(rejects, str):
+                failed(rejects)
+                return
+            summary = f"Imported {inserted} product(s)."
+            if rejects:
+                details = "\n".join(f"Row {row_number}: {reason}" for row_number, reason in rejects[:15])
+                more = f"\n... and {len(rejects) - 15} more." if len(rejects) > 15 else ""
+                summary += f"\n{len(rejects)} row(s) rejected:\n{details}{more}"
+            messagebox.showinfo("Import Products", summary)
+            load_data()
+
+        def failed(e):
+            msg_label.config(text="Import failed.", fg="red")
+            messagebox.showerror("Import Products", str(e))
+
+        msg_label.config(text="Importing products...", fg="blue")
+        worker.submit(ProductImporter.import_file, db, path, widget=tree,
+                      on_done=imported, on_error=failed)
+
+    # ===== REPRICE PRODUCTS =====
+    def reprice_selected():
+        sel = tree.selection()
+        if not sel:
+            messagebox.showwarning("Reprice", "Select at least one product to reprice.")
+            return
+
+        product_ids = [tree.item(iid, "values")[0] for iid in sel]
+        percent = simpledialog.askfloat(
+            "Reprice Selected",
+            f"Capital change in % for {len(product_ids)} product(s)\n(e.g. 5 for +5%, -3 for -3%):",
+            parent=gui
+        )
+        if percent is None:
+            return
+
+        def repriced(response):
+            success, result = response
+            if not success:
+                messagebox.showerror("Reprice Selected", result)
+                return
+            messagebox.showinfo("Reprice Selected", f"Repriced {result} product(s).")
+            load_data()
+
+        msg_label.config(text=f"Repricing {len(product_ids)} product(s)...", fg="blue")
+        worker.submit(Product.bulk_update, db, product_ids=product_ids, capital_percent=percent,
+                      widget=tree, on_done=repriced,
+                      on_error=lambda e: messagebox.showerror("Reprice Selected", str(e)))
+
     # ===== EDIT PRODUCT =====
     def edit_selected_dialog():
         sel = tree.selection()
@@ -403,14 +538,16 @@ def Inventory():
                     return
 
                 # Send to backend, which handles ALL FK validation + logic
-                msg = proxy.update_method(db, product_id, updates)
+                def saved(msg):
+                    if "successfully" in msg.lower():
+                        messagebox.showinfo("Update Successful", msg)
+                        dialog.destroy()
+                        load_data()
+                    else:
+                        messagebox.showerror("Error", msg)
 
-                if "successfully" in msg.lower():
-                    messagebox.showinfo("Update Successful", msg)
-                    dialog.destroy()
-                    load_data()
-                else:
-                    messagebox.showerror("Error", msg)
+                worker.submit(proxy.update_method, db, product_id, updates, widget=dialog, on_done=saved,
+                              on_error=lambda e: messagebox.showerror("Error", str(e)))
 
             except Exception as e:
                 messagebox.showerror("Error", str(e))
@@ -430,15 +567,16 @@ def Inventory():
         if not messagebox.askyesno("Confirm", f"Delete {len(product_ids)} product(s)?"):
             return
 
-        proxy = _product_proxy()
-        deleted_count = 0
-        for pid in product_ids:
-            msg = proxy.delete_method(pid, db)
-            if "success" in msg.lower():
-                deleted_count += 1
+        def deleted(response):
+            success, outcomes = response
+            if not success:
+                messagebox.showerror("Delete Product(s)", outcomes)
+                return
+            messagebox.showinfo("Delete Product(s)", delete_summary("product", outcomes))
+            load_data()
 
-        messagebox.showinfo("Delete Product(s)", f"Deleted {deleted_count} of {len(product_ids)} selected product(s).")
-        load_data()
+        worker.submit(Product.delete_many, product_ids, db, widget=tree, on_done=deleted,
+                      on_error=lambda e: messagebox.showerror("Delete Product(s)", str(e)))
 
     load_data()
 
@@ -470,15 +608,21 @@ def DailySales():
     display_headers = ["Date", "Total Sales"]
     
     tree = TreeView(tree_frame, display_headers, width=150)
+    formatters = {1: peso}  # total_sales
 
     # ===== STORE CURRENT DATA =====
     all_data = []
 
     # ===== LOAD DATA =====
     def load_data():
+        msg_label.config(text="Loading daily sales...", fg="blue")
+        worker.submit(DailyFinancials.summarize_daily_sales, db, key="daily_sales", widget=tree,
+                      on_done=show_data, on_error=lambda e: msg_label.config(text=str(e), fg="red"))
+
+    def show_data(response):
         nonlocal all_data
         tree.delete(*tree.get_children())
-        success, result = DailyFinancials.summarize_daily_sales(db)
+        success, result = response
         if not success:
             msg_label.config(text=result, fg="red")
             return
@@ -486,7 +630,7 @@ def DailySales():
         all_data = result  # store for searching
 
         for row in result:
-            tree.insert("", "end", values=row)
+            tree.insert("", "end", values=format_values(row, formatters))
         msg_label.config(text=f"{len(result)} day(s) loaded.", fg="green")
 
     # ===== SEARCH FUNCTION =====
@@ -496,14 +640,14 @@ def DailySales():
 
         if not keyword:
             for row in all_data:
-                tree.insert("", "end", values=row)
+                tree.insert("", "end", values=format_values(row, formatters))
             msg_label.config(text="Showing all days.", fg="blue")
             return
 
         filtered = [r for r in all_data if keyword in str(r[0]).lower()]  # search by date only
 
         for row in filtered:
-            tree.insert("", "end", values=row)
+            tree.insert("", "end", values=format_values(row, formatters))
 
         msg_label.config(
             text=f"{len(filtered)} result(s) found for '{keyword}'." if filtered else f"No results for '{keyword}'.",
@@ -546,9 +690,14 @@ def MonthlySales(): #may bug sa show error sa pag aadd
 
     # ===== LOAD DATA =====
     def load_data():
+        msg_label.config(text="Loading monthly financials...", fg="blue")
+        worker.submit(Financials.calculate_monthly_financials, db, key="monthly_sales", widget=tree,
+                      on_done=show_data, on_error=lambda e: msg_label.config(text=str(e), fg="red"))
+
+    def show_data(response):
         nonlocal all_data
         tree.delete(*tree.get_children())
-        success, result = Financials.calculate_monthly_financials(db)
+        success, result = response
         if not success:
             msg_label.config(text=result, fg="red")
             return
@@ -556,9 +705,9 @@ def MonthlySales(): #may bug sa show error sa pag aadd
         all_data = result
         for row in result:
             values = [
-                row["month"], row["total_sales"], row["total_capital"],
-                row["gross_profit"], row["operating_expenses"], row["taxes"],
-                row["operating_profit"], row["net_profit"]
+                row["month"], peso(row["total_sales"]), peso(row["total_capital"]),
+                peso(row["gross_profit"]), peso(row["operating_expenses"]), peso(row["taxes"]),
+                peso(row["operating_profit"]), peso(row["net_profit"])
             ]
             tree.insert("", "end", values=values)
         msg_label.config(text=f"{len(result)} month(s) loaded.", fg="green")
@@ -575,9 +724,9 @@ def MonthlySales(): #may bug sa show error sa pag aadd
 
         for row in filtered:
             values = [
-                row["month"], row["total_sales"], row["total_capital"],
-                row["gross_profit"], row["operating_expenses"], row["taxes"],
-                row["operating_profit"], row["net_profit"]
+                row["month"], peso(row["total_sales"]), peso(row["total_capital"]),
+                peso(row["gross_profit"]), peso(row["operating_expenses"]), peso(row["taxes"]),
+                peso(row["operating_profit"]), peso(row["net_profit"])
             ]
             tree.insert("", "end", values=values)
 
@@ -642,13 +791,19 @@ def MonthlySales(): #may bug sa show error sa pag aadd
                         raise ValueError("Expenses and Taxes cannot be negative.")
 
                     # Calculate and update monthly financials
-                    success, results = Financials.calculate_monthly_financials(db, month, expenses, taxes)
-                    if success:
-                        messagebox.showinfo("Data Updated", "Additional Expenses and Taxes added successfully.")
-                        dialog.destroy()
-                        load_data()
-                    else:
-                        messagebox.showerror("Error", results)
+                    def saved(response):
+                        success, results = response
+                        if success:
+                            messagebox.showinfo("Data Updated", "Additional Expenses and Taxes added successfully.")
+                            dialog.destroy()
+                            load_data()
+                        else:
+                            messagebox.showerror("Error", results)
+
+                    # No key: a refresh of the monthly view must not supersede the write
+                    worker.submit(Financials.calculate_monthly_financials, db, month, expenses, taxes,
+                                  widget=dialog, on_done=saved,
+                                  on_error=lambda e: messagebox.showerror("Error", str(e)))
 
                 except ValueError as e:
                     messagebox.showerror("Input Error", str(e))
@@ -700,28 +855,42 @@ def Suppliers():
         return Supplier("temp", "temp", "123", "temp@mail.com", "temp address")
 
     # ===== LOAD DATA =====
+    def show_error(e):
+        msg_label.config(text=f"Error loading data: {e}", fg="red")
+
     def load_data():
-        try:
-            tree.delete(*tree.get_children())
-            proxy = _supplier_proxy()
-            res = proxy.view_method(db, choice="all")
+        msg_label.config(text="Loading suppliers...", fg="blue")
+        proxy = _supplier_proxy()
+        worker.submit(proxy.view_method, db, choice="all", key="suppliers", widget=tree,
+                      on_done=show_suppliers, on_error=show_error)
 
-            if isinstance(res, str):
-                msg_label.config(text=res, fg="red")
-                return
+    def show_suppliers(res):
+        tree.delete(*tree.get_children())
 
-            for row in res:
-                tree.insert("", "end", values=[row.get(h, "") for h in headers])
-            msg_label.config(text=f"{len(res)} supplier(s) loaded.", fg="green")
-        except Exception as e:
-            msg_label.config(text=f"Error loading data: {e}", fg="red")
+        if isinstance(res, str):
+            msg_label.config(text=res, fg="red")
+            return
+
+        for row in res:
+            tree.insert("", "end", values=[row.get(h, "") for h in headers])
+        msg_label.config(text=f"{len(res)} supplier(s) loaded.", fg="green")
 
     # ===== SEARCH SUPPLIER =====
     def search_supplier(keyword):
         keyword = keyword.strip()
+        if keyword:
+            worker.submit(Supplier.search, db, keyword, key="suppliers", widget=tree,
+                          on_done=lambda res: show_search(keyword, res), on_error=show_error)
+        else:
+            proxy = _supplier_proxy()
+            worker.submit(proxy.view_method, db, choice="all", key="suppliers", widget=tree,
+                          on_done=lambda res: show_search(keyword, res), on_error=show_error)
+
+    def show_search(keyword, res):
         tree.delete(*tree.get_children())
-        proxy = _supplier_proxy()
-        res = proxy.view_method(db, choice="all")
+        if isinstance(res, str):
+            msg_label.config(text=res, fg="red")
+            return
 
         if not keyword:
             for row in res:
@@ -729,13 +898,7 @@ def Suppliers():
             msg_label.config(text="Showing all suppliers.", fg="blue")
             return
 
-        filtered = [
-            item for item in res
-            if keyword.lower() in str(item.get("supplier_name", "")).lower()
-            or keyword.lower() in str(item.get("contact_person", "")).lower()
-            or keyword.lower() in str(item.get("email", "")).lower()
-        ]
-
+        filtered = res
         for row in filtered:
             tree.insert("", "end", values=[row.get(h, "") for h in headers])
 
@@ -774,10 +937,14 @@ def Suppliers():
                 addr = entries["Address"].get().strip()
 
                 sup = Supplier(sname, cperson, cnum, email, addr)
-                msg = sup.add_method(db)
-                messagebox.showinfo("Add Supplier", msg)
-                dialog.destroy()
-                load_data()
+
+                def saved(msg):
+                    messagebox.showinfo("Add Supplier", msg)
+                    dialog.destroy()
+                    load_data()
+
+                worker.submit(sup.add_method, db, widget=dialog, on_done=saved,
+                              on_error=lambda e: messagebox.showerror("Error", str(e)))
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
@@ -823,11 +990,14 @@ def Suppliers():
                     messagebox.showinfo("Edit", "No changes detected.")
                     return
 
+                def saved(msg):
+                    messagebox.showinfo("Update Successful", msg)
+                    dialog.destroy()
+                    load_data()
+
                 proxy = _supplier_proxy()
-                msg = proxy.update_method(db, supplier_id, updates)
-                messagebox.showinfo("Update Successful", msg)
-                dialog.destroy()
-                load_data()
+                worker.submit(proxy.update_method, db, supplier_id, updates, widget=dialog, on_done=saved,
+                              on_error=lambda e: messagebox.showerror("Error", str(e)))
             except Exception as e:
                 messagebox.showerror("Error", str(e))
 
@@ -850,20 +1020,16 @@ def Suppliers():
         if not messagebox.askyesno("Confirm", f"Delete {len(supplier_ids)} supplier(s)?"):
             return
 
-        proxy = _supplier_proxy()
-        deleted_count = 0
-
-        for sid in supplier_ids:
-            msg = proxy.delete_method(sid, db)
-            if "success" in msg.lower():
-                deleted_count += 1
-
-        messagebox.showinfo(
-            "Delete Supplier(s)",
-            f"Deleted {deleted_count} of {len(supplier_ids)} selected supplier(s)."
-        )
+        def deleted(response):
+            success, outcomes = response
+            if not success:
+                messagebox.showerror("Delete Supplier(s)", outcomes)
+                return
+            messagebox.showinfo("Delete Supplier(s)", delete_summary("supplier", outcomes))
+            load_data()
 
-        load_data()
+        worker.submit(Supplier.delete_many, supplier_ids, db, widget=tree, on_done=deleted,
+                      on_error=lambda e: messagebox.showerror("Delete Supplier(s)", str(e)))
     
     load_data()
 
@@ -900,22 +1066,28 @@ def OrderHistory():
 
     display_headers = ["Order ID", "Date", "Customer","Contact","Address", "Product", "Price", "Qty", "Total"]
     tree = TreeView(tree_frame, display_headers, width=120)
+    formatters = {6: peso, 8: peso}  # srp, total_price
 
     # ===== STORE CURRENT DATA =====
     all_data = []
 
     # ===== LOAD DATA =====
     def load_data():
+        msg_label.config(text="Loading order history...", fg="blue")
+        worker.submit(DailyFinancials.fetch_orders_report, db, key="order_history", widget=tree,
+                      on_done=show_data, on_error=lambda e: msg_label.config(text=str(e), fg="red"))
+
+    def show_data(response):
         nonlocal all_data
         tree.delete(*tree.get_children())
-        success, result = DailyFinancials.fetch_orders_report(db)
+        success, result = response
         if not success:
             msg_label.config(text=result, fg="red")
             return
 
         all_data = result  # store for searching
         for row in result:
-            tree.insert("", "end", values=row)
+            tree.insert("", "end", values=format_values(row, formatters))
         msg_label.config(text=f"{len(result)} record(s) loaded.", fg="green")
 
     # ===== SEARCH FUNCTION =====
@@ -925,7 +1097,7 @@ def OrderHistory():
 
         if not keyword:
             for row in all_data:
-                tree.insert("", "end", values=row)
+                tree.insert("", "end", values=format_values(row, formatters))
             msg_label.config(text="Showing all orders.", fg="blue")
             return
 
@@ -937,7 +1109,7 @@ def OrderHistory():
         ]
 
         for row in filtered:
-            tree.insert("", "end", values=row)
+            tree.insert("", "end", values=format_values(row, formatters))
 
         msg_label.config(
             text=f"{len(filtered)} result(s) found for '{keyword}'." if filtered else f"No results for '{keyword}'.",
@@ -989,7 +1161,7 @@ def logCond(username, password_input):
 def SignUpToDatabase(username, password, fullname, contact_number, gender, age, address, entries, db = db):
     try:
         Users.validate_signup(
-            username, password, fullname, contact_number, gender, age, address
+            username, password, fullname, contact_number, gender, age, address, db=db
         )
         
         try:
@@ -1313,12 +1485,8 @@ def UserHomePage():
 
     # ===================== LOAD ITEMS FROM DATABASE =====================
     def load_items():
-        conn = sqlite3.connect("./Hardware and Construction.db")
-        c = conn.cursor()
-        c.execute("SELECT product_name, srp FROM products")
-        items = c.fetchall()
-        conn.close()
-        return items
+        db.cursor.execute("SELECT product_name, srp FROM products")
+        return db.cursor.fetchall()
 
     products = load_items()
 
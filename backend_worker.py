@@ -0,0 +1,128 @@
+"""
+Runs MNE backend calls off the Tk main thread.
+
+The GUI submits a backend call and gets a Future back straight away, so the
+window keeps repainting while the query runs. Results are handed back on the
+Tk thread by polling a queue with `root.after`, because Tk widgets may only
+be touched from the thread running mainloop. Worker threads borrow their own
+connections from the Database pool.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+logger = logging.getLogger("backend.worker")
+
+
+class BackendWorker:
+    """
+    Thread pool facade for the backend classes.
+
+    Args:
+        root: Any Tk widget; its `after` drives delivery of results.
+        max_workers (int): Size of the worker pool.
+        poll_ms (int): How often finished calls are checked for while any are pending.
+    """
+
+    def __init__(self, root, max_workers=4, poll_ms=25):
+        self.root = root
+        self.poll_ms = poll_ms
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="backend")
+        self._finished = queue.SimpleQueue()
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._polling = False
+
+    def submit(self, fn, *args, key=None, on_done=None, on_error=None, widget=None, **kwargs) -> Future:
+        """
+        Run fn(*args, **kwargs) on a worker thread.
+
+        Args:
+            key (str, optional): Requests sharing a key supersede each other; an
+                older one is cancelled if it has not started, and its result
+                is dropped if it has.
+            on_done (callable, optional): Called on the Tk thread with the result.
+            on_error (callable, optional): Called on the Tk thread with the exception.
+            widget (optional): Callbacks are skipped once this widget is destroyed,
+                e.g. after the user switched screens.
+
+        Returns:
+            Future: The pending call.
+        """
+        future = self._executor.submit(fn, *args, **kwargs)
+
+        if key is not None:
+            with self._lock:
+                previous = self._latest.get(key)
+                self._latest[key] = future
+            if previous is not None:
+                previous.cancel()
+
+        self._pending += 1
+        future.add_done_callback(lambda f: self._finished.put((key, f, on_done, on_error, widget)))
+        self._schedule_poll()
+        return future
+
+    def cancel(self, key):
+        """Cancel (or ignore the result of) the latest request made under key."""
+        with self._lock:
+            future = self._latest.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def _schedule_poll(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        try:
+            while True:
+                try:
+                    key, future, on_done, on_error, widget = self._finished.get_nowait()
+                except queue.Empty:
+                    break
+
+                self._pending -= 1
+                if future.cancelled():
+                    continue
+
+                if key is not None:
+                    with self._lock:
+                        if self._latest.get(key) is not future:
+                            continue  # superseded by a newer request
+                        del self._latest[key]
+
+                try:
+                    if widget is not None and not widget.winfo_exists():
+                        continue
+                    self._deliver(future, on_done, on_error)
+                except Exception:
+                    logger.exception("Backend worker callback failed")
+        finally:
+            # Keep polling even if a callback blew up, or every later result would be lost
+            self._polling = False
+            if self._pending > 0:
+                self._schedule_poll()
+
+    @staticmethod
+    def _deliver(future, on_done, on_error):
+        error = future.exception()
+        if error is None:
+            if on_done is None:
+                return
+            try:
+                on_done(future.result())
+                return
+            except Exception as e:
+                if on_error is None:
+                    raise
+                error = e  # a failing on_done is reported like a failed call
+        if on_error is not None:
+            on_error(error)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
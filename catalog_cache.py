@@ -0,0 +1,149 @@
+"""
+In-process caches for product catalog reads.
+
+Browsing the Inventory screen re-runs the same joined queries over and over
+while the data rarely changes. CatalogCache keeps recent results in memory,
+keyed by the query and its arguments, and drops them all as soon as anything
+in the database changes. Changes are detected with `PRAGMA data_version` on a
+connection of the cache's own: its value moves whenever another connection
+(another thread of the pool, or another terminal) commits, and reading it
+does not touch any table.
+
+ReferenceCache holds the category, product type and supplier names used for
+foreign-key checks and for labelling product rows.
+"""
+import sqlite3
+import threading
+from collections import OrderedDict
+
+
+class CatalogCache:
+    """
+    LRU cache of catalog query results, revalidated against PRAGMA data_version.
+
+    Args:
+        database_name (str): The database file whose changes invalidate the cache.
+        max_entries (int): How many distinct result sets (filters, pages) are kept.
+    """
+
+    def __init__(self, database_name, max_entries=64):
+        self.max_entries = int(max_entries)
+        self._conn = sqlite3.connect(database_name, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+        self.hits = 0
+        self.misses = 0
+
+    def _data_version(self):
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+
+    def get_or_load(self, key, loader, store_if=None):
+        """
+        Return the cached result for key, or call loader() and cache what it returns.
+
+        Args:
+            key (hashable): The query name and its arguments.
+            loader (callable): Runs the query; called outside the cache lock.
+            store_if (callable, optional): Only results it accepts are cached,
+                so error messages are never served from memory.
+        """
+        with self._lock:
+            version = self._data_version()
+            if version != self._version:
+                self._entries.clear()
+                self._version = version
+            elif key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        # The version was read before the query ran, so the result is at least
+        # that fresh; a commit landing in between only makes the next read reload.
+        value = loader()
+        if store_if is not None and not store_if(value):
+            return value
+
+        with self._lock:
+            if self._version == version:
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def close(self):
+        self.invalidate()
+        self._conn.close()
+
+
+class ReferenceCache:
+    """
+    In-memory copy of the small reference tables: categories, product types
+    and suppliers, as {id: name}.
+
+    The tables are loaded once and reloaded only when the revision token that
+    their triggers maintain (see migrations.create_reference_revision) has
+    moved. The token is read through the caller's connection, so a write made
+    earlier in the caller's own transaction is seen straight away, and a
+    rolled-back one is dropped again on the next read.
+    """
+
+    QUERIES = {
+        "category": "SELECT category_id, category_name FROM category",
+        "product_type": "SELECT type_id, type_name FROM product_type",
+        "supplier": "SELECT supplier_id, supplier_name FROM supplier",
+    }
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tables = {}
+        self._revision = None
+
+    @staticmethod
+    def _current_revision(conn):
+        try:
+            row = conn.execute("SELECT revision FROM reference_revision WHERE id = 1").fetchone()
+        except sqlite3.OperationalError:
+            return None  # database not migrated yet: never trust the copy
+        return row[0] if row else None
+
+    def snapshot(self, conn) -> dict:
+        """
+        Return {table: {id: name}} for all three tables, reading the revision
+        token once. Use it when one operation checks or labels several tables.
+        """
+        revision = self._current_revision(conn)
+        with self._lock:
+            if revision is None or revision != self._revision:
+                self._tables = {name: dict(conn.execute(query).fetchall())
+                                for name, query in self.QUERIES.items()}
+                self._revision = revision
+            return self._tables
+
+    def names(self, conn, table) -> dict:
+        """Return {id: name} for table ("category", "product_type" or "supplier")."""
+        if table not in self.QUERIES:
+            raise ValueError(f"Unknown reference table: {table}")
+        return self.snapshot(conn)[table]
+
+    def exists(self, conn, table, value) -> bool:
+        try:
+            return int(value) in self.names(conn, table)
+        except (TypeError, ValueError):
+            return False
+
+    def invalidate(self):
+        with self._lock:
+            self._tables = {}
+            self._revision = None
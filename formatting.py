@@ -0,0 +1,41 @@
+"""
+Display formatting for peso amounts and quantities.
+
+The backend returns plain numbers; screens format them here, only for the
+rows they actually show. Results are memoized because the same prices and
+totals repeat across rows, pages and refreshes.
+"""
+from functools import lru_cache
+
+
+@lru_cache(maxsize=8192)
+def peso(value) -> str:
+    """12345.5 -> '₱12,345.50'; None and non-numbers are shown as they are."""
+    if value is None or value == "":
+        return ""
+    try:
+        return f"₱{float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+@lru_cache(maxsize=8192)
+def number(value) -> str:
+    """1234 -> '1,234.00'"""
+    if value is None or value == "":
+        return ""
+    try:
+        return f"{float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def format_values(values, formatters):
+    """
+    Format one row for display.
+
+    Args:
+        values (sequence): The raw row values.
+        formatters (dict): {column index: formatter}; other columns are left as they are.
+    """
+    return [formatters[i](v) if i in formatters else v for i, v in enumerate(values)]
@@ -0,0 +1,376 @@
+"""
+Concurrent checkout load test for the MNE backend.
+
+Copies a database (the shop's own by default) to a scratch file, adds a
+block of generated products with known stock, then lets N cashiers — threads
+sharing one Database pool, or separate processes with a pool each — sell
+random carts as fast as they can. Afterwards it reports throughput, p50/p99
+latency, how often a cashier hit "database is locked" and had to retry, and
+any stock that no longer adds up:
+
+    * products with negative stock,
+    * products whose quantity differs from the opening stock minus what the
+      cashiers were told they sold,
+    * products whose quantity differs from the sum of their stock_movements,
+    * products whose total_capital is not quantity * capital.
+
+Workloads:
+    order     Order.create_order, add_order_items, then
+              InventoryManager.checkout_order (three transactions, like the POS screen)
+    checkout  InventoryManager.checkout (one transaction per cart)
+    writer    InventoryManager.checkout queued through an OrderWriter
+
+Everything runs locally; nothing outside the scratch copy is written.
+
+    python load_test.py --workers 8 --orders 200 --workload checkout
+    python load_test.py --workers 4 --mode process --workload order --json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import Counter
+
+from MNE import Database, Product, InventoryManager, Customers
+from order_writer import OrderWriter
+
+
+WORKLOADS = ("order", "checkout", "writer")
+MODES = ("thread", "process")
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _is_lock_error(message) -> bool:
+    text = str(message).lower()
+    return "locked" in text or "busy" in text
+
+
+# ===== SCRATCH DATABASE =====
+def generate_database(source, target, products=50, stock=1000, capital=100.0):
+    """
+    Copy source to target and add `products` generated products with `stock`
+    units each, using the first category, type and supplier of the copy.
+
+    Returns:
+        {product_id: opening quantity} for the generated products.
+    """
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(target + suffix):
+            os.remove(target + suffix)
+
+    src, dst = sqlite3.connect(source), sqlite3.connect(target)
+    try:
+        src.backup(dst)
+    finally:
+        src.close()
+        dst.close()
+
+    db = Database(target, catalog_cache_size=0)
+    try:
+        category_id = db.conn.execute("SELECT MIN(category_id) FROM category").fetchone()[0]
+        type_id = db.conn.execute("SELECT MIN(type_id) FROM product_type").fetchone()[0]
+        supplier_id = db.conn.execute("SELECT MIN(supplier_id) FROM supplier").fetchone()[0]
+        if None in (category_id, type_id, supplier_id):
+            raise ValueError("The source database needs at least one category, product type and supplier.")
+
+        last_id = db.conn.execute("SELECT COALESCE(MAX(product_id), 0) FROM products").fetchone()[0]
+        tag = time.strftime("%Y%m%d%H%M%S")
+        inserted, rejects = Product.bulk_add(db, [
+            {"product_name": f"Load Test Item {tag}-{n:04d}", "category_id": category_id,
+             "type_id": type_id, "quantity": stock, "capital": capital, "supplier_id": supplier_id}
+            for n in range(1, products + 1)
+        ])
+        if isinstance(rejects, str):
+            raise ValueError(f"Could not generate products: {rejects}")
+        if rejects:
+            raise ValueError(f"Could not generate products: {rejects[0][1]}")
+
+        rows = db.conn.execute("SELECT product_id, quantity FROM products WHERE product_id > ?",
+                               (last_id,)).fetchall()
+        return dict(rows)
+    finally:
+        db.close()
+
+
+# ===== CASHIER =====
+def _retrying(call, lock_retries, stats):
+    """Run call() -> (success, result), retrying while it fails on the write lock."""
+    for attempt in range(lock_retries + 1):
+        success, result = call()
+        if success or not _is_lock_error(result):
+            return success, result
+        if attempt < lock_retries:
+            stats["lock_retries"] += 1
+            time.sleep(0.005 * (attempt + 1))
+    stats["lock_failures"] += 1
+    return False, result
+
+
+def _sell(workload, db, writer, manager, customer, cart, lock_retries, stats):
+    if workload == "checkout":
+        return _retrying(lambda: manager.checkout(customer, cart, db), lock_retries, stats)
+
+    if workload == "writer":
+        return writer.checkout(customer, cart).result()
+
+    success, customer_id = _retrying(lambda: manager.create_customer(customer, db), lock_retries, stats)
+    if not success:
+        return False, customer_id
+    success, order_id = _retrying(lambda: manager.create_order(customer_id, db), lock_retries, stats)
+    if not success:
+        return False, order_id
+    success, message = _retrying(lambda: manager.add_order_items(order_id, cart, db), lock_retries, stats)
+    if not success:
+        return False, message
+    return _retrying(lambda: manager.checkout_order(order_id, db), lock_retries, stats)
+
+
+def run_cashier(config, worker_number, db=None, writer=None, start=None):
+    """
+    Sell config["orders"] random carts and return the cashier's measurements.
+
+    In thread mode the shared db (and writer) are passed in; in process mode
+    the cashier opens its own pool on config["database"].
+    """
+    own_db = db is None
+    if own_db:
+        db = Database(config["database"], run_migrations=False, catalog_cache_size=0,
+                      busy_timeout=config["busy_timeout"])
+    own_writer = config["workload"] == "writer" and writer is None
+    if own_writer:
+        writer = OrderWriter(db)
+
+    rng = random.Random(config["seed"] * 1000 + worker_number)
+    product_ids = config["product_ids"]
+    manager = InventoryManager()
+    stats = Counter()
+    sold = Counter()
+    latencies = []
+
+    try:
+        if start is not None:
+            start.wait()
+        started = time.time()
+
+        for n in range(config["orders"]):
+            lines = rng.randint(1, config["max_lines"])
+            cart = {product_id: rng.randint(1, config["max_quantity"])
+                    for product_id in rng.sample(product_ids, min(lines, len(product_ids)))}
+            customer = Customers(f"Load Cashier {worker_number} Customer {n % config['customers']}",
+                                 f"09{worker_number:03d}{n % config['customers']:06d}")
+
+            t0 = time.perf_counter()
+            try:
+                success, result = _sell(config["workload"], db, writer, manager, customer, cart,
+                                        config["lock_retries"], stats)
+            except Exception as e:
+                success, result = False, e
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+            if success:
+                stats["succeeded"] += 1
+                sold.update(cart)
+            elif isinstance(result, Exception) or not (
+                    "Insufficient stock" in str(result) or "Not enough quantity" in str(result)):
+                stats["errors"] += 1
+                if _is_lock_error(result) and config["workload"] == "writer":
+                    stats["lock_failures"] += 1
+            else:
+                stats["rejected"] += 1
+
+        finished = time.time()
+    finally:
+        if own_writer:
+            writer.close()
+            stats["lock_retries"] += writer.stats()["lock_retries"]
+        if own_db:
+            db.close()
+        else:
+            db.release()
+
+    return {"started": started, "finished": finished, "latencies": latencies,
+            "stats": dict(stats), "sold": dict(sold)}
+
+
+def _run_process_cashier(args):
+    return run_cashier(*args)
+
+
+# ===== CONSISTENCY =====
+def check_consistency(database, opening, sold):
+    """
+    List stock problems for the generated products.
+
+    Args:
+        opening (dict): {product_id: quantity before the run}.
+        sold (dict): {product_id: units the cashiers were told they sold}.
+    """
+    conn = sqlite3.connect(database)
+    try:
+        ids = json.dumps(list(opening))
+        rows = conn.execute("""
+            SELECT p.product_id, p.quantity, p.capital, p.total_capital,
+                   (SELECT COALESCE(SUM(m.quantity_change), 0) FROM stock_movements AS m
+                    WHERE m.product_id = p.product_id)
+            FROM products AS p
+            WHERE p.product_id IN (SELECT value FROM json_each(?))
+        """, (ids,)).fetchall()
+    finally:
+        conn.close()
+
+    violations = []
+    for product_id, quantity, capital, total_capital, ledger in rows:
+        expected = opening[product_id] - sold.get(product_id, 0)
+        if quantity < 0:
+            violations.append(f"Product {product_id}: negative stock ({quantity}).")
+        if quantity != expected:
+            violations.append(f"Product {product_id}: quantity {quantity}, expected {expected} "
+                              f"from {sold.get(product_id, 0)} sold.")
+        if quantity != ledger:
+            violations.append(f"Product {product_id}: quantity {quantity}, stock ledger says {ledger}.")
+        if abs(float(total_capital) - round(quantity * float(capital), 2)) > 0.005:
+            violations.append(f"Product {product_id}: total_capital {total_capital} "
+                              f"does not match quantity {quantity} x capital {capital}.")
+    if len(rows) != len(opening):
+        violations.append(f"{len(opening) - len(rows)} generated product(s) are missing.")
+    return violations
+
+
+# ===== RUN =====
+def run(database, workers=4, orders=100, workload="checkout", mode="thread", products=50,
+        stock=1000, max_lines=3, max_quantity=3, customers=20, lock_retries=5, busy_timeout=5000,
+        seed=1):
+    """
+    Run one load test on a copy of database and return the report as a dict.
+    """
+    if workload not in WORKLOADS:
+        raise ValueError(f"workload must be one of {', '.join(WORKLOADS)}.")
+    if mode not in MODES:
+        raise ValueError(f"mode must be one of {', '.join(MODES)}.")
+
+    scratch_dir = tempfile.mkdtemp(prefix="mne-load-")
+    scratch = os.path.join(scratch_dir, "load_test.db")
+    try:
+        opening = generate_database(database, scratch, products, stock)
+        config = {"database": scratch, "workload": workload, "orders": orders,
+                  "product_ids": sorted(opening), "max_lines": max_lines,
+                  "max_quantity": max_quantity, "customers": customers,
+                  "lock_retries": lock_retries, "busy_timeout": busy_timeout, "seed": seed}
+
+        if mode == "thread":
+            db = Database(scratch, run_migrations=False, catalog_cache_size=0, busy_timeout=busy_timeout)
+            writer = OrderWriter(db) if workload == "writer" else None
+            start = threading.Barrier(workers)
+            results = [None] * workers
+
+            def cashier(number):
+                results[number] = run_cashier(config, number, db, writer, start)
+
+            threads = [threading.Thread(target=cashier, args=(n,)) for n in range(workers)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            writer_retries = 0
+            if writer is not None:
+                writer.close()
+                writer_retries = writer.stats()["lock_retries"]
+            db.close()
+        else:
+            with multiprocessing.Pool(workers) as pool:
+                results = pool.map(_run_process_cashier, [(config, n) for n in range(workers)])
+            writer_retries = 0
+
+        stats = Counter()
+        sold = Counter()
+        latencies = []
+        for result in results:
+            stats.update(result["stats"])
+            sold.update(result["sold"])
+            latencies.extend(result["latencies"])
+        latencies.sort()
+        stats["lock_retries"] += writer_retries
+
+        elapsed = max(r["finished"] for r in results) - min(r["started"] for r in results)
+        attempted = len(latencies)
+        violations = check_consistency(scratch, opening, sold)
+
+        return {
+            "workload": workload, "mode": mode, "workers": workers,
+            "orders": attempted, "succeeded": stats["succeeded"],
+            "rejected": stats["rejected"], "errors": stats["errors"],
+            "seconds": round(elapsed, 3),
+            "throughput": round(stats["succeeded"] / elapsed, 1) if elapsed > 0 else 0.0,
+            "p50_ms": round(_percentile(latencies, 0.50), 2),
+            "p99_ms": round(_percentile(latencies, 0.99), 2),
+            "max_ms": round(latencies[-1], 2) if latencies else 0.0,
+            "lock_retries": stats["lock_retries"], "lock_failures": stats["lock_failures"],
+            "units_sold": sum(sold.values()),
+            "violations": violations,
+        }
+    finally:
+        shutil.rmtree(scratch_dir, ignore_errors=True)
+
+
+def print_report(report):
+    print(f"Workload {report['workload']} / {report['mode']} x {report['workers']}")
+    print(f"  Orders:        {report['orders']} ({report['succeeded']} sold, "
+          f"{report['rejected']} out of stock, {report['errors']} errors)")
+    print(f"  Throughput:    {report['throughput']} checkouts/s over {report['seconds']} s")
+    print(f"  Latency:       p50 {report['p50_ms']} ms, p99 {report['p99_ms']} ms, max {report['max_ms']} ms")
+    print(f"  Lock retries:  {report['lock_retries']} ({report['lock_failures']} gave up)")
+    print(f"  Units sold:    {report['units_sold']}")
+    if report["violations"]:
+        print(f"  Stock violations: {len(report['violations'])}")
+        for violation in report["violations"][:20]:
+            print(f"    {violation}")
+    else:
+        print("  Stock violations: none")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent checkout load test for the MNE backend.")
+    parser.add_argument("--database", default="Hardware and Construction.db",
+                        help="database to copy; the original is never written")
+    parser.add_argument("--workers", type=int, default=4, help="concurrent cashiers")
+    parser.add_argument("--orders", type=int, default=100, help="carts per cashier")
+    parser.add_argument("--workload", choices=WORKLOADS, default="checkout")
+    parser.add_argument("--mode", choices=MODES, default="thread")
+    parser.add_argument("--products", type=int, default=50, help="generated products")
+    parser.add_argument("--stock", type=int, default=1000, help="opening stock per generated product")
+    parser.add_argument("--max-lines", type=int, default=3, help="most products per cart")
+    parser.add_argument("--max-quantity", type=int, default=3, help="most units per cart line")
+    parser.add_argument("--customers", type=int, default=20, help="distinct customers per cashier")
+    parser.add_argument("--lock-retries", type=int, default=5)
+    parser.add_argument("--busy-timeout", type=int, default=5000, help="milliseconds")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args(argv)
+
+    report = run(args.database, workers=args.workers, orders=args.orders, workload=args.workload,
+                 mode=args.mode, products=args.products, stock=args.stock, max_lines=args.max_lines,
+                 max_quantity=args.max_quantity, customers=args.customers,
+                 lock_retries=args.lock_retries, busy_timeout=args.busy_timeout, seed=args.seed)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 1 if report["violations"] else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,449 @@
+"""
+Versioned schema migrations for the store databases.
+
+The schema version lives in `PRAGMA user_version`. Each migration is a
+(version, description, steps) tuple; a step is either an SQL string or a
+callable that receives the connection. Pending migrations run in version
+order at startup, each one in its own transaction together with the bump of
+`user_version`, so a half-applied step is never recorded as done.
+"""
+import sqlite3
+
+
+def execute_script(conn: sqlite3.Connection, script: str):
+    """
+    Run a multi-statement script inside the caller's transaction.
+
+    Connection.executescript() would COMMIT the open migration transaction
+    first, so statements are split on complete-statement boundaries (which
+    keeps trigger bodies intact) and executed one by one.
+    """
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+    if statement.strip():
+        conn.execute(statement)
+
+
+def fts5_available(conn: sqlite3.Connection) -> bool:
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)")
+        conn.execute("DROP TABLE temp.fts5_probe")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def create_search_indexes(conn: sqlite3.Connection):
+    """
+    Full-text indexes for the product and supplier search bars.
+
+    product_search holds one row per product (rowid = product_id) with the
+    product, category, type and supplier names; supplier_search one row per
+    supplier. Triggers keep both in step with the base tables, including
+    renames of a category, type or supplier. Skipped on SQLite builds
+    without FTS5; the backend then falls back to LIKE filters.
+    """
+    if not fts5_available(conn):
+        return
+
+    execute_script(conn, """
+        CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+            product_name, category_name, type_name, supplier_name,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS supplier_search USING fts5(
+            supplier_name, contact_person, email,
+            tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS trg_product_search_insert AFTER INSERT ON products BEGIN
+            INSERT INTO product_search (rowid, product_name, category_name, type_name, supplier_name)
+            VALUES (
+                new.product_id, new.product_name,
+                (SELECT category_name FROM category WHERE category_id = new.category_id),
+                (SELECT type_name FROM product_type WHERE type_id = new.type_id),
+                (SELECT supplier_name FROM supplier WHERE supplier_id = new.supplier_id)
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_product_search_update
+        AFTER UPDATE OF product_name, category_id, type_id, supplier_id ON products BEGIN
+            DELETE FROM product_search WHERE rowid = old.product_id;
+            INSERT INTO product_search (rowid, product_name, category_name, type_name, supplier_name)
+            VALUES (
+                new.product_id, new.product_name,
+                (SELECT category_name FROM category WHERE category_id = new.category_id),
+                (SELECT type_name FROM product_type WHERE type_id = new.type_id),
+                (SELECT supplier_name FROM supplier WHERE supplier_id = new.supplier_id)
+            );
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_product_search_delete AFTER DELETE ON products BEGIN
+            DELETE FROM product_search WHERE rowid = old.product_id;
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_product_search_category
+        AFTER UPDATE OF category_name ON category BEGIN
+            UPDATE product_search SET category_name = new.category_name
+            WHERE rowid IN (SELECT product_id FROM products WHERE category_id = new.category_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_product_search_type
+        AFTER UPDATE OF type_name ON product_type BEGIN
+            UPDATE product_search SET type_name = new.type_name
+            WHERE rowid IN (SELECT product_id FROM products WHERE type_id = new.type_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_supplier_search_insert AFTER INSERT ON supplier BEGIN
+            INSERT INTO supplier_search (rowid, supplier_name, contact_person, email)
+            VALUES (new.supplier_id, new.supplier_name, new.contact_person, new.email);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_supplier_search_update
+        AFTER UPDATE OF supplier_name, contact_person, email ON supplier BEGIN
+            DELETE FROM supplier_search WHERE rowid = old.supplier_id;
+            INSERT INTO supplier_search (rowid, supplier_name, contact_person, email)
+            VALUES (new.supplier_id, new.supplier_name, new.contact_person, new.email);
+            UPDATE product_search SET supplier_name = new.supplier_name
+            WHERE rowid IN (SELECT product_id FROM products WHERE supplier_id = new.supplier_id);
+        END;
+
+        CREATE TRIGGER IF NOT EXISTS trg_supplier_search_delete AFTER DELETE ON supplier BEGIN
+            DELETE FROM supplier_search WHERE rowid = old.supplier_id;
+        END;
+
+        INSERT INTO product_search (product_search, rank) VALUES ('rank', 'bm25(10.0, 2.0, 2.0, 1.0)');
+        INSERT INTO supplier_search (supplier_search, rank) VALUES ('rank', 'bm25(10.0, 2.0, 1.0)');
+
+        DELETE FROM product_search;
+        INSERT INTO product_search (rowid, product_name, category_name, type_name, supplier_name)
+        SELECT p.product_id, p.product_name, c.category_name, t.type_name, s.supplier_name
+        FROM products p
+        LEFT JOIN category c ON p.category_id = c.category_id
+        LEFT JOIN product_type t ON p.type_id = t.type_id
+        LEFT JOIN supplier s ON p.supplier_id = s.supplier_id;
+
+        DELETE FROM supplier_search;
+        INSERT INTO supplier_search (rowid, supplier_name, contact_person, email)
+        SELECT supplier_id, supplier_name, contact_person, email FROM supplier;
+    """)
+
+
+def create_reference_revision(conn: sqlite3.Connection):
+    """
+    A single-row revision token for the reference tables.
+
+    Every insert, update or delete on category, product_type or supplier
+    sets it to a fresh random value, so ReferenceCache can tell with one
+    primary-key read whether its copy of those tables is still current.
+    A random token rather than a counter means a rolled-back write can never
+    be mistaken for a different, committed one.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS reference_revision (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            revision INTEGER NOT NULL
+        )
+    """)
+    conn.execute("INSERT OR IGNORE INTO reference_revision (id, revision) VALUES (1, random())")
+    for table in ("category", "product_type", "supplier"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(f"""
+                CREATE TRIGGER IF NOT EXISTS trg_{table}_revision_{event.lower()}
+                AFTER {event} ON {table} BEGIN
+                    UPDATE reference_revision SET revision = random() WHERE id = 1;
+                END
+            """)
+
+
+# Grouping columns of inventory_valuation: dimension name -> products column
+VALUATION_DIMENSIONS = {"category": "category_id", "type": "type_id", "supplier": "supplier_id"}
+
+
+def create_inventory_valuation(conn: sqlite3.Connection):
+    """
+    Running inventory totals per category, product type and supplier.
+
+    inventory_valuation has one row per (dimension, group_id) with the
+    number of products, units on hand, total capital and retail value
+    (quantity * srp). Triggers on products take the old row out of its groups
+    and add the new row to its groups, so reading valuations never scans the
+    products table.
+    """
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS inventory_valuation (
+            dimension TEXT NOT NULL,
+            group_id INTEGER NOT NULL,
+            product_count INTEGER NOT NULL DEFAULT 0,
+            units INTEGER NOT NULL DEFAULT 0,
+            total_capital DECIMAL(12,2) NOT NULL DEFAULT 0,
+            retail_value DECIMAL(12,2) NOT NULL DEFAULT 0,
+            PRIMARY KEY (dimension, group_id)
+        ) WITHOUT ROWID
+    """)
+
+    def add(row):
+        return "".join(f"""
+            INSERT INTO inventory_valuation (dimension, group_id, product_count, units, total_capital, retail_value)
+            VALUES ('{dimension}', {row}.{column}, 1, {row}.quantity, {row}.total_capital,
+                    ROUND({row}.quantity * {row}.srp, 2))
+            ON CONFLICT (dimension, group_id) DO UPDATE SET
+                product_count = product_count + 1,
+                units = units + excluded.units,
+                total_capital = ROUND(total_capital + excluded.total_capital, 2),
+                retail_value = ROUND(retail_value + excluded.retail_value, 2);"""
+            for dimension, column in VALUATION_DIMENSIONS.items())
+
+    def remove(row):
+        return "".join(f"""
+            UPDATE inventory_valuation SET
+                product_count = product_count - 1,
+                units = units - {row}.quantity,
+                total_capital = ROUND(total_capital - {row}.total_capital, 2),
+                retail_value = ROUND(retail_value - ROUND({row}.quantity * {row}.srp, 2), 2)
+            WHERE dimension = '{dimension}' AND group_id = {row}.{column};"""
+            for dimension, column in VALUATION_DIMENSIONS.items())
+
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_products_valuation_insert AFTER INSERT ON products BEGIN
+            {add("new")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_products_valuation_delete AFTER DELETE ON products BEGIN
+            {remove("old")}
+        END
+    """)
+    conn.execute(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_products_valuation_update
+        AFTER UPDATE OF quantity, srp, total_capital, category_id, type_id, supplier_id ON products BEGIN
+            {remove("old")}
+            {add("new")}
+        END
+    """)
+
+    conn.execute("DELETE FROM inventory_valuation")
+    for dimension, column in VALUATION_DIMENSIONS.items():
+        conn.execute(f"""
+            INSERT INTO inventory_valuation (dimension, group_id, product_count, units, total_capital, retail_value)
+            SELECT '{dimension}', {column}, COUNT(*), SUM(quantity),
+                   ROUND(SUM(total_capital), 2), ROUND(SUM(ROUND(quantity * srp, 2)), 2)
+            FROM products
+            GROUP BY {column}
+        """)
+
+
+def customer_key(name, contact) -> str:
+    """
+    Identity of a customer for lookups at checkout: the name trimmed, with
+    inner whitespace collapsed and case-folded, plus the digits of the
+    contact number. "Juan  Dela Cruz" / "0917-123 4567" and
+    "juan dela cruz" / "09171234567" are the same customer.
+    """
+    name = " ".join(str(name or "").split()).casefold()
+    digits = "".join(ch for ch in str(contact or "") if ch.isdigit())
+    return f"{name}|{digits}"
+
+
+def add_customer_key(conn: sqlite3.Connection):
+    """
+    Add customers.customer_key with a unique index. Where existing rows
+    collapse to the same key, the oldest customer keeps it and the others
+    are left without one (their orders stay attached to them).
+    """
+    conn.execute("ALTER TABLE customers ADD COLUMN customer_key TEXT")
+
+    seen, keys = set(), []
+    for customer_id, name, contact in conn.execute(
+            "SELECT customer_id, customer_name, contact FROM customers ORDER BY customer_id").fetchall():
+        key = customer_key(name, contact)
+        if key not in seen:
+            seen.add(key)
+            keys.append((key, customer_id))
+    conn.executemany("UPDATE customers SET customer_key = ? WHERE customer_id = ?", keys)
+
+    conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_key ON customers (customer_key)")
+    conn.execute("DROP INDEX IF EXISTS idx_customers_identity")
+
+
+# ===== Hardware and Construction.db (MNE backend) =====
+MNE_MIGRATIONS = [
+    (1, "Index order_items by order and by product", [
+        """CREATE INDEX IF NOT EXISTS idx_order_items_order
+           ON order_items (order_id, product_id, quantity)""",
+        """CREATE INDEX IF NOT EXISTS idx_order_items_product
+           ON order_items (product_id, order_id, quantity)""",
+    ]),
+    (2, "Index orders by date for daily and monthly grouping", [
+        """CREATE INDEX IF NOT EXISTS idx_orders_date
+           ON orders (order_date, customer_id)""",
+    ]),
+    (3, "Index the product duplicate check", [
+        """CREATE INDEX IF NOT EXISTS idx_products_identity
+           ON products (product_name, category_id, type_id, supplier_id)""",
+    ]),
+    (4, "Index the customer lookup used at checkout", [
+        """CREATE INDEX IF NOT EXISTS idx_customers_identity
+           ON customers (customer_name, contact, address)""",
+    ]),
+    (5, "Index product filter and sort columns for paginated views", [
+        "CREATE INDEX IF NOT EXISTS idx_products_category ON products (category_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_type ON products (type_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_supplier ON products (supplier_id)",
+        "CREATE INDEX IF NOT EXISTS idx_products_date_received ON products (date_received)",
+    ]),
+    (6, "Full-text search over products and suppliers", [
+        create_search_indexes,
+    ]),
+    (7, "Index orders by customer for the customer delete check", [
+        "CREATE INDEX IF NOT EXISTS idx_orders_customer ON orders (customer_id)",
+    ]),
+    (8, "Revision token for the category, type and supplier caches", [
+        create_reference_revision,
+    ]),
+    (9, "Index expiration dates and end of lifespan for the expiry scanner", [
+        """CREATE INDEX IF NOT EXISTS idx_products_expiration
+           ON products (expiration_date, quantity)
+           WHERE expiration_date IS NOT NULL AND expiration_date <> ''""",
+        """ALTER TABLE products ADD COLUMN lifespan_end TEXT
+           GENERATED ALWAYS AS (
+               CASE WHEN lifespan > 0 THEN date(date_received, '+' || lifespan || ' days') END
+           ) VIRTUAL""",
+        """CREATE INDEX IF NOT EXISTS idx_products_lifespan_end
+           ON products (lifespan_end, quantity)
+           WHERE lifespan_end IS NOT NULL""",
+    ]),
+    (10, "Trigger-maintained inventory valuation per category, type and supplier", [
+        create_inventory_valuation,
+    ]),
+    (11, "Stock movement ledger and periodic stock snapshots", [
+        """CREATE TABLE IF NOT EXISTS stock_movements (
+               movement_id INTEGER PRIMARY KEY AUTOINCREMENT,
+               product_id INTEGER NOT NULL,
+               moved_at TEXT NOT NULL,
+               kind TEXT NOT NULL CHECK (kind IN ('receipt', 'sale', 'adjustment')),
+               quantity_change INTEGER NOT NULL,
+               order_id INTEGER,
+               note TEXT
+           )""",
+        """CREATE INDEX IF NOT EXISTS idx_stock_movements_product
+           ON stock_movements (product_id, moved_at, quantity_change)""",
+        """CREATE INDEX IF NOT EXISTS idx_stock_movements_moved_at
+           ON stock_movements (moved_at, product_id, quantity_change)""",
+        # quantity on hand per product at the start of snapshot_date
+        """CREATE TABLE IF NOT EXISTS stock_snapshots (
+               snapshot_date TEXT NOT NULL,
+               product_id INTEGER NOT NULL,
+               quantity INTEGER NOT NULL,
+               PRIMARY KEY (snapshot_date, product_id)
+           ) WITHOUT ROWID""",
+        """CREATE INDEX IF NOT EXISTS idx_stock_snapshots_product
+           ON stock_snapshots (product_id, snapshot_date)""",
+        # Removing a product writes off whatever was left on hand
+        """CREATE TRIGGER IF NOT EXISTS trg_products_movement_delete
+           AFTER DELETE ON products WHEN old.quantity <> 0 BEGIN
+               INSERT INTO stock_movements (product_id, moved_at, kind, quantity_change, note)
+               VALUES (old.product_id, datetime('now', 'localtime'), 'adjustment', -old.quantity, 'product deleted');
+           END""",
+        """INSERT INTO stock_movements (product_id, moved_at, kind, quantity_change, note)
+           SELECT product_id, datetime('now', 'localtime'), 'adjustment', quantity, 'opening balance'
+           FROM products
+           WHERE quantity <> 0""",
+    ]),
+    (12, "Normalized unique customer key for the checkout upsert", [
+        add_customer_key,
+    ]),
+    (13, "Record the unit price and cost of each order item at sale time", [
+        "ALTER TABLE order_items ADD COLUMN unit_price DECIMAL(10,2)",
+        "ALTER TABLE order_items ADD COLUMN unit_cost DECIMAL(10,2)",
+        # Earlier sales only have today's prices to go on
+        """UPDATE order_items
+           SET unit_price = p.srp, unit_cost = p.capital
+           FROM products AS p
+           WHERE p.product_id = order_items.product_id AND order_items.unit_price IS NULL""",
+    ]),
+    (14, "One order_items line per product and order", [
+        # Fold repeated lines into the first one before the index can be built
+        """UPDATE order_items
+           SET quantity = (SELECT SUM(d.quantity) FROM order_items AS d
+                           WHERE d.order_id = order_items.order_id AND d.product_id = order_items.product_id)
+           WHERE order_item_id IN (SELECT MIN(order_item_id) FROM order_items
+                                   GROUP BY order_id, product_id HAVING COUNT(*) > 1)""",
+        """DELETE FROM order_items
+           WHERE order_item_id NOT IN (SELECT MIN(order_item_id) FROM order_items
+                                       GROUP BY order_id, product_id)""",
+        """CREATE UNIQUE INDEX IF NOT EXISTS idx_order_items_line
+           ON order_items (order_id, product_id)""",
+        "DROP INDEX IF EXISTS idx_order_items_order",
+    ]),
+]
+
+
+# ===== HNC_DB.db (New_Backend) =====
+HNC_MIGRATIONS = [
+    (1, "Index order_items by order and by product", [
+        """CREATE INDEX IF NOT EXISTS idx_order_items_order
+           ON order_items (order_id, product_id, quantity)""",
+        """CREATE INDEX IF NOT EXISTS idx_order_items_product
+           ON order_items (product_id, order_id, quantity)""",
+    ]),
+    (2, "Index orders by date for daily and monthly grouping", [
+        """CREATE INDEX IF NOT EXISTS idx_orders_date
+           ON orders (order_date, customer_id)""",
+    ]),
+    (3, "Index the product duplicate check", [
+        """CREATE INDEX IF NOT EXISTS idx_products_identity
+           ON products (product_name, product_type, supplier)""",
+    ]),
+    (4, "Index the customer lookup used at checkout", [
+        """CREATE INDEX IF NOT EXISTS idx_customers_identity
+           ON customers (customer_name, contact, address)""",
+    ]),
+]
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn: sqlite3.Connection, migrations=MNE_MIGRATIONS) -> list[int]:
+    """
+    Apply every migration newer than the database's user_version.
+
+    Safe to call on every startup and from several terminals at once: the
+    version is re-read under the write lock, so a step another process has
+    already applied is skipped.
+
+    Returns:
+        list[int]: The versions applied by this call.
+    """
+    applied = []
+    for version, description, steps in sorted(migrations, key=lambda m: m[0]):
+        if version <= schema_version(conn):
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if version <= schema_version(conn):
+                conn.execute("ROLLBACK")
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    conn.execute(step)
+
+            conn.execute(f"PRAGMA user_version = {int(version)}")
+            conn.execute("COMMIT")
+        except Exception as e:
+            conn.execute("ROLLBACK")
+            raise sqlite3.DatabaseError(f"Migration {version} ({description}) failed: {e}") from e
+
+        applied.append(version)
+    return applied
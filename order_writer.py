@@ -0,0 +1,150 @@
+"""
+Group-commit writer for checkouts.
+
+SQLite has a single writer. When several terminals check out at once, each
+one opening its own write transaction means they queue on the lock (or fail
+with "database is locked") and pay for a commit each. OrderWriter funnels
+writes through one thread instead: requests wait in a queue, and the thread
+runs whatever is pending (up to max_batch) inside one transaction and one
+commit. It never idles waiting for company: requests that arrive while a batch
+is being committed simply make up the next one. Each request gets its own
+savepoint, so a failed checkout is rolled back alone, and its Future is
+resolved only after the batch has been committed. Readers keep using their
+own pooled connections and are not affected.
+"""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+
+from MNE import Database, InventoryManager
+
+
+_STOP = object()
+
+
+class OrderWriter:
+    """
+    Dedicated writer thread with group commit.
+
+    Args:
+        db (Database): The connection pool; the writer thread borrows its own connection.
+        max_batch (int): Most requests committed together.
+        max_delay_ms (float): How long a batch keeps taking requests that are still
+            arriving; it is committed as soon as the queue is empty.
+        lock_retries (int): How often a batch is retried when another process holds the lock.
+    """
+
+    def __init__(self, db: Database, max_batch=64, max_delay_ms=5, lock_retries=5):
+        self.db = db
+        self.max_batch = int(max_batch)
+        self.max_delay = max_delay_ms / 1000
+        self.lock_retries = int(lock_retries)
+        self._queue = queue.SimpleQueue()
+        self._manager = InventoryManager()
+        self._stats = {"requests": 0, "batches": 0, "lock_retries": 0}
+        self._stats_lock = threading.Lock()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="order-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, fn, *args, **kwargs) -> Future:
+        """
+        Queue fn(*args, **kwargs) to run on the writer thread. fn should do
+        its writes through the pool (db.transaction()), which the writer has
+        already opened, so they join the batch's transaction.
+
+        Returns:
+            Future: Resolves with fn's return value once the batch is committed.
+        """
+        if self._closed:
+            raise RuntimeError("OrderWriter is closed.")
+        future = Future()
+        self._queue.put((future, fn, args, kwargs))
+        return future
+
+    def checkout(self, customer, cart) -> Future:
+        """Queue InventoryManager.checkout(customer, cart); the Future gives its (success, result)."""
+        return self.submit(self._manager.checkout, customer, cart, self.db)
+
+    def stats(self) -> dict:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def close(self, timeout=None):
+        """Finish the queued requests and stop the writer thread."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    # ===== WRITER THREAD =====
+    def _run(self):
+        try:
+            stopping = False
+            while not stopping:
+                first = self._queue.get()
+                if first is _STOP:
+                    break
+
+                batch = [first]
+                deadline = time.monotonic() + self.max_delay
+                while len(batch) < self.max_batch and time.monotonic() < deadline:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                self._commit(batch)
+        finally:
+            self.db.release()
+
+    def _commit(self, batch):
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        for attempt in range(self.lock_retries + 1):
+            try:
+                results = []
+                with self.db.transaction():
+                    for future, fn, args, kwargs in batch:
+                        try:
+                            with self.db.transaction():  # savepoint: a failure undoes this request only
+                                results.append((True, fn(*args, **kwargs)))
+                        except Exception as e:
+                            results.append((False, e))
+                break
+            except sqlite3.OperationalError as e:
+                # Another process holds the write lock past busy_timeout: the whole
+                # batch was rolled back, so it can simply be run again
+                if attempt < self.lock_retries and ("locked" in str(e) or "busy" in str(e)):
+                    with self._stats_lock:
+                        self._stats["lock_retries"] += 1
+                    time.sleep(0.01 * (attempt + 1))
+                    continue
+                self._fail(batch, e)
+                return
+            except Exception as e:
+                self._fail(batch, e)
+                return
+
+        with self._stats_lock:
+            self._stats["batches"] += 1
+            self._stats["requests"] += len(batch)
+
+        for (future, *_), (ok, value) in zip(batch, results):
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    @staticmethod
+    def _fail(batch, error):
+        for future, *_ in batch:
+            future.set_exception(error)
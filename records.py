@@ -0,0 +1,117 @@
+"""
+Slotted record objects for query results.
+
+`RecordFactory` is an sqlite3 row_factory. It maps the cursor's column names
+to a `__slots__` class once per statement (the class itself is cached per
+column list), so every row costs one small fixed-size object instead of a
+fresh dict. Each class gets a generated positional `__init__`, so building a
+record is as cheap as building the dict was. Records keep the dict-style
+`get`, `[]` and `keys` the GUI uses.
+"""
+import keyword
+
+_record_types = {}
+
+
+class Record:
+    __slots__ = ()
+    _fields = ()
+
+    def __init__(self, *values):
+        for name, value in zip(self._fields, values):
+            setattr(self, name, value)
+
+    def get(self, name, default=None):
+        return getattr(self, name, default) if name in self._fields else default
+
+    def __getitem__(self, name):
+        if name not in self._fields:
+            raise KeyError(name)
+        return getattr(self, name)
+
+    def __contains__(self, name):
+        return name in self._fields
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def keys(self):
+        return self._fields
+
+    def values(self):
+        return [getattr(self, name) for name in self._fields]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self._fields]
+
+    def as_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            return self.items() == other.items()
+        if isinstance(other, dict):
+            return self.as_dict() == other
+        return NotImplemented
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+
+def _compile_init(fields: tuple):
+    """
+    Build `def __init__(self, _0, _1, ...): self.a = _0; ...` for fields, or
+    return None when a column name cannot be written as an attribute
+    (e.g. a keyword), in which case the generic Record.__init__ is kept.
+    """
+    if any(keyword.iskeyword(name) for name in fields):
+        return None
+    params = "".join(f", _{i}" for i in range(len(fields)))
+    body = "".join(f"\n    self.{name} = _{i}" for i, name in enumerate(fields)) or "\n    pass"
+    namespace = {}
+    exec(f"def __init__(self{params}):{body}", namespace)
+    return namespace["__init__"]
+
+
+def record_type(fields: tuple, name: str = "Record") -> type:
+    """Return the cached Record subclass with the given slot names."""
+    key = (name, fields)
+    cls = _record_types.get(key)
+    if cls is None:
+        attrs = {"__slots__": fields, "_fields": fields}
+        init = _compile_init(fields)
+        if init is not None:
+            attrs["__init__"] = init
+        cls = type(name, (Record,), attrs)
+        _record_types[key] = cls
+    return cls
+
+
+class RecordFactory:
+    """
+    sqlite3 row_factory producing `name` records.
+
+    The column map is rebuilt only when the cursor's description changes,
+    i.e. once per executed statement rather than once per row.
+    """
+
+    def __init__(self, name: str = "Record"):
+        self.name = name
+        self._cached = (None, None)
+
+    def __call__(self, cursor, row):
+        description, cls = self._cached
+        if cursor.description is not description:
+            description = cursor.description
+            cls = record_type(tuple(column[0] for column in description), self.name)
+            self._cached = (description, cls)
+        return cls(*row)
+
+
+ProductRecord = RecordFactory("ProductRecord")
+SupplierRecord = RecordFactory("SupplierRecord")
+CustomerRecord = RecordFactory("CustomerRecord")
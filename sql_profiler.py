@@ -0,0 +1,185 @@
+"""
+SQL instrumentation for the Database classes in MNE.py and New_Backend.py.
+
+A QueryProfiler records, per normalized SQL text, how long each statement
+took, how many rows it touched and which backend method issued it. When it
+is disabled the Database hands out plain sqlite3 cursors, so leaving the
+profiler wired in costs nothing until it is switched on.
+"""
+import logging
+import re
+import sys
+import threading
+import time
+from collections import deque
+
+
+logger = logging.getLogger("sql.slow")
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(sql: str) -> str:
+    """Collapse whitespace and literals so the same statement groups together."""
+    text = _STRING_LITERAL.sub("?", sql)
+    text = _NUMBER_LITERAL.sub("?", text)
+    text = _WHITESPACE.sub(" ", text).strip()
+    return _IN_LIST.sub("(?, ...)", text)
+
+
+def _percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryProfiler:
+    """
+    Collects timings for every statement run through a ProfiledCursor.
+
+    Args:
+        slow_ms (float, optional): Statements slower than this are written to
+            the "sql.slow" logger. None disables the slow-query log.
+        sample_size (int): How many recent timings are kept per statement for
+            the percentile figures.
+    """
+
+    def __init__(self, slow_ms=None, sample_size=512):
+        self.enabled = False
+        self.slow_ms = slow_ms
+        self.sample_size = sample_size
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._normalized = {}
+
+    def enable(self, slow_ms=None):
+        if slow_ms is not None:
+            self.slow_ms = slow_ms
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+    def record(self, sql, elapsed_ms, rowcount, caller):
+        key = self._normalized.get(sql)
+        if key is None:
+            key = normalize_sql(sql)
+            if len(self._normalized) < 4096:
+                self._normalized[sql] = key
+
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is None:
+                entry = {
+                    "calls": 0, "total_ms": 0.0, "max_ms": 0.0, "rows": 0,
+                    "callers": set(), "samples": deque(maxlen=self.sample_size)
+                }
+                self._stats[key] = entry
+            entry["calls"] += 1
+            entry["total_ms"] += elapsed_ms
+            entry["max_ms"] = max(entry["max_ms"], elapsed_ms)
+            entry["rows"] += max(rowcount, 0)
+            entry["callers"].add(caller)
+            entry["samples"].append(elapsed_ms)
+
+        if self.slow_ms is not None and elapsed_ms >= self.slow_ms:
+            touched = f" ({rowcount} rows)" if rowcount >= 0 else ""
+            logger.warning("slow query %.1f ms in %s%s: %s", elapsed_ms, caller, touched, key)
+
+    def add_rows(self, sql, rows):
+        """Credit rows fetched by a SELECT to its statement (rowcount is -1 for queries)."""
+        key = self._normalized.get(sql) or normalize_sql(sql)
+        with self._lock:
+            entry = self._stats.get(key)
+            if entry is not None:
+                entry["rows"] += rows
+
+    def stats(self) -> list[dict]:
+        """
+        Return one dict per normalized statement, slowest p95 first, with
+        calls, total_ms, p50_ms, p95_ms, max_ms, rows and callers.
+        """
+        with self._lock:
+            snapshot = [(key, dict(entry, samples=sorted(entry["samples"]), callers=sorted(entry["callers"])))
+                        for key, entry in self._stats.items()]
+
+        report = []
+        for key, entry in snapshot:
+            report.append({
+                "sql": key,
+                "calls": entry["calls"],
+                "total_ms": round(entry["total_ms"], 3),
+                "p50_ms": round(_percentile(entry["samples"], 0.50), 3),
+                "p95_ms": round(_percentile(entry["samples"], 0.95), 3),
+                "max_ms": round(entry["max_ms"], 3),
+                "rows": entry["rows"],
+                "callers": entry["callers"]
+            })
+        report.sort(key=lambda r: r["p95_ms"], reverse=True)
+        return report
+
+
+class ProfiledCursor:
+    """Wraps a sqlite3.Cursor and reports execute/executemany timings to a QueryProfiler."""
+
+    def __init__(self, cursor, profiler: QueryProfiler):
+        self._cursor = cursor
+        self._profiler = profiler
+        self._last_sql = None
+
+    def _caller(self):
+        frame = sys._getframe(2)
+        self_obj = frame.f_locals.get("self")
+        if self_obj is not None and not isinstance(self_obj, ProfiledCursor):
+            return f"{type(self_obj).__name__}.{frame.f_code.co_name}"
+        return frame.f_code.co_name
+
+    def execute(self, sql, parameters=()):
+        self._last_sql = sql
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(sql, parameters)
+        finally:
+            self._profiler.record(sql, (time.perf_counter() - start) * 1000,
+                                  self._cursor.rowcount, self._caller())
+
+    def executemany(self, sql, seq_of_parameters):
+        self._last_sql = None
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(sql, seq_of_parameters)
+        finally:
+            self._profiler.record(sql, (time.perf_counter() - start) * 1000,
+                                  self._cursor.rowcount, self._caller())
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None and self._last_sql is not None:
+            self._profiler.add_rows(self._last_sql, 1)
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._cursor.fetchmany(size if size is not None else self._cursor.arraysize)
+        if self._last_sql is not None:
+            self._profiler.add_rows(self._last_sql, len(rows))
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        if self._last_sql is not None:
+            self._profiler.add_rows(self._last_sql, len(rows))
+        return rows
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)